@@ -1,22 +1,690 @@
+import time
+_START_TIME = time.perf_counter()
+
 import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog, ttk
-from PIL import Image, ImageTk
-import cv2
-import numpy as np
+from tkinter import filedialog, messagebox, ttk
+import importlib.util
 import os
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.style as style
+import sys
+import argparse
+import queue
+import threading
+import types
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import citra_trace as trace
+
+
+def _lazy_import(name):
+    """Import a module on first attribute access instead of now
+    
+    OpenCV, numpy, PIL and matplotlib dominate cold-start time but are not
+    needed to show the window. Note that a plain `import name` elsewhere
+    still triggers the real import, so modules that import cv2 or the
+    engine at top level must themselves be imported lazily here.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+cv2 = _lazy_import('cv2')
+ImageTk = _lazy_import('PIL.ImageTk')
+engine = _lazy_import('citra_engine')
+citra_pipeline = _lazy_import('citra_pipeline')
+citra_workspace = _lazy_import('citra_workspace')
+citra_thumbs = _lazy_import('citra_thumbs')
+morph = _lazy_import('citra_morphology')
+
+_IMPORT_TIME = time.perf_counter() - _START_TIME
+
+# Cold-start budget (ms to first window) checked by --startup-profile
+STARTUP_BUDGET_MS = 1500
+# Modules whose presence after startup means a lazy import was defeated
+HEAVY_MODULES = ('numpy', 'cv2', 'matplotlib', 'PIL.Image')
+
+class BackgroundWorker:
+    """Run processing jobs off the Tk thread
+    
+    Jobs run on a small thread pool (OpenCV releases the GIL). Results are
+    handed back on the Tk thread by polling the future with root.after, so
+    no Tk call is ever made from a worker thread. Only the most recently
+    submitted job may deliver its result; submitting a new job cancels the
+    previous one and drops its result when it eventually finishes.
+    """
+    POLL_MS = 50
+    SPINNER = "◐◓◑◒"
+    
+    def __init__(self, root, on_progress):
+        self.root = root
+        self.on_progress = on_progress
+        # Two threads so a new job can start while a stale one winds down
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="citra-worker")
+        self._job = None
+    
+    @staticmethod
+    def _run(func, cancel_event):
+        """Worker-thread side of a job"""
+        if cancel_event.is_set():
+            raise engine.OperationCancelled()
+        return func(cancel_event)
+    
+    def submit(self, label, func, on_done, on_error=None, on_cancel=None):
+        """Run func(cancel_event) in the background
+        
+        on_done(result) / on_error(exception) / on_cancel() are called on the
+        Tk thread. Long jobs may check cancel_event between steps and return
+        early.
+        """
+        self.cancel()
+        cancel_event = threading.Event()
+        job = {
+            'label': label,
+            'future': self._executor.submit(self._run, func, cancel_event),
+            'cancel_event': cancel_event,
+            'on_done': on_done,
+            'on_error': on_error,
+            'on_cancel': on_cancel,
+            'start': time.perf_counter(),
+            'ticks': 0,
+        }
+        self._job = job
+        self._poll(job)
+    
+    def cancel(self):
+        """Cancel the current job; returns True if one was running"""
+        job, self._job = self._job, None
+        if job is None:
+            return False
+        job['cancel_event'].set()
+        job['future'].cancel()
+        if job['on_cancel'] is not None:
+            job['on_cancel']()
+        return True
+    
+    def is_busy(self):
+        return self._job is not None
+    
+    def _poll(self, job):
+        """Check the job from the Tk thread and deliver its result when done"""
+        if job is not self._job:
+            return  # Superseded or cancelled: drop the stale result
+        
+        future = job['future']
+        if not future.done():
+            elapsed = time.perf_counter() - job['start']
+            spinner = self.SPINNER[job['ticks'] % len(self.SPINNER)]
+            job['ticks'] += 1
+            self.on_progress(f"{spinner} {job['label']}... {elapsed:.1f} s (Esc untuk batal)")
+            self.root.after(self.POLL_MS, self._poll, job)
+            return
+        
+        self._job = None
+        try:
+            result = future.result()
+        except engine.OperationCancelled:
+            return
+        except Exception as e:
+            if job['on_error'] is not None:
+                job['on_error'](e)
+            return
+        job['on_done'](result)
+    
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LivePreviewDialog:
+    """Slider dialog that previews a point operation on a downscaled proxy
+    
+    Slider events are coalesced: at most one preview is rendered per
+    FRAME_MS, always for the latest slider value. The full-resolution
+    result is only computed when the user presses "Terapkan".
+    """
+    FRAME_MS = 16
+    
+    def __init__(self, app, title, label, initial, preview, on_commit):
+        self.app = app
+        self.preview = preview
+        self.on_commit = on_commit
+        self._pending = None
+        self._rendered_value = None
+        colors = app.colors
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title(title)
+        self.window.configure(bg=colors['bg_secondary'])
+        self.window.resizable(False, False)
+        self.window.transient(app.root)
+        
+        tk.Label(
+            self.window,
+            text=label,
+            font=('Segoe UI', 11),
+            bg=colors['bg_secondary'],
+            fg=colors['text_primary']
+        ).pack(padx=20, pady=(15, 5), anchor="w")
+        
+        self.value = tk.IntVar(value=initial)
+        scale = tk.Scale(
+            self.window,
+            from_=0,
+            to=255,
+            orient="horizontal",
+            length=320,
+            variable=self.value,
+            command=self._on_slide,
+            bg=colors['bg_secondary'],
+            fg=colors['text_primary'],
+            highlightthickness=0,
+            troughcolor=colors['bg_tertiary']
+        )
+        scale.pack(padx=20, fill="x")
+        
+        self.timing_var = tk.StringVar(value="")
+        tk.Label(
+            self.window,
+            textvariable=self.timing_var,
+            font=('Segoe UI', 9),
+            bg=colors['bg_secondary'],
+            fg=colors['text_secondary']
+        ).pack(padx=20, anchor="w")
+        
+        button_frame = tk.Frame(self.window, bg=colors['bg_secondary'])
+        button_frame.pack(padx=20, pady=15, fill="x")
+        for text, command, color in (("✅ Terapkan", self.commit, '#6B728E'),
+                                     ("✖ Batal", self.cancel, colors['bg_tertiary'])):
+            btn = tk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                font=('Segoe UI', 10),
+                bg=color,
+                fg='white',
+                relief='flat',
+                cursor='hand2'
+            )
+            btn.pack(side="left", expand=True, fill="x", padx=5)
+            app.add_button_hover_effect(btn, color)
+        
+        self.window.bind("<Return>", lambda e: self.commit())
+        self.window.bind("<Escape>", lambda e: self.cancel())
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.window.grab_set()
+        scale.focus_set()
+        self._render()
+    
+    def _on_slide(self, _value):
+        """Schedule a preview unless one is already pending"""
+        if self._pending is None:
+            self._pending = self.window.after(self.FRAME_MS, self._render)
+    
+    def _render(self):
+        self._pending = None
+        value = self.value.get()
+        if value == self._rendered_value:
+            return
+        start = time.perf_counter()
+        try:
+            self.app.show_preview(self.preview(value))
+        except Exception as e:
+            self.timing_var.set(f"Pratinjau gagal: {str(e)}")
+            return
+        self._rendered_value = value
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.timing_var.set(f"Pratinjau: {elapsed_ms:.1f} ms")
+    
+    def _close(self):
+        if self._pending is not None:
+            self.window.after_cancel(self._pending)
+            self._pending = None
+        self.window.grab_release()
+        self.window.destroy()
+    
+    def commit(self):
+        value = self.value.get()
+        self._close()
+        self.on_commit(value)
+    
+    def cancel(self):
+        self._close()
+        self.app.restore_processed_view()
+
+
+class OptionsDialog:
+    """Small form of choices, integers and flags; on_commit gets {key: value}
+    
+    fields is a list of (key, label, spec) where spec is one of
+    ('choice', ((value, text), ...)), ('int', low, high, initial) or
+    ('flag', initial).
+    """
+    
+    def __init__(self, app, title, fields, on_commit, note=None):
+        self.on_commit = on_commit
+        colors = app.colors
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title(title)
+        self.window.configure(bg=colors['bg_secondary'])
+        self.window.resizable(False, False)
+        self.window.transient(app.root)
+        
+        if note:
+            tk.Label(
+                self.window,
+                text=note,
+                font=('Segoe UI', 10),
+                bg=colors['bg_secondary'],
+                fg=colors['text_secondary'],
+                justify="left"
+            ).pack(padx=20, pady=(15, 0), anchor="w")
+        
+        form = tk.Frame(self.window, bg=colors['bg_secondary'])
+        form.pack(padx=20, pady=(15, 5), fill="x")
+        self._fields = []
+        for row, (key, label, spec) in enumerate(fields):
+            kind = spec[0]
+            if kind == 'choice':
+                choices = spec[1]
+                var = tk.StringVar(value=choices[0][1])
+                widget = ttk.Combobox(form, textvariable=var, state="readonly",
+                                      values=[text for _, text in choices])
+            elif kind == 'int':
+                _, low, high, initial = spec
+                var = tk.IntVar(value=initial)
+                widget = tk.Spinbox(form, from_=low, to=high, textvariable=var, width=8)
+            else:
+                var = tk.BooleanVar(value=spec[1])
+                widget = tk.Checkbutton(
+                    form,
+                    variable=var,
+                    bg=colors['bg_secondary'],
+                    selectcolor=colors['bg_tertiary'],
+                    activebackground=colors['bg_secondary']
+                )
+            tk.Label(
+                form,
+                text=label,
+                font=('Segoe UI', 11),
+                bg=colors['bg_secondary'],
+                fg=colors['text_primary']
+            ).grid(row=row, column=0, sticky="w", pady=3)
+            widget.grid(row=row, column=1, sticky="ew" if kind != 'flag' else "w", padx=(10, 0), pady=3)
+            self._fields.append((key, spec, var))
+        
+        button_frame = tk.Frame(self.window, bg=colors['bg_secondary'])
+        button_frame.pack(padx=20, pady=15, fill="x")
+        for text, command, color in (("✅ Terapkan", self.commit, '#6B728E'),
+                                     ("✖ Batal", self.cancel, colors['bg_tertiary'])):
+            btn = tk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                font=('Segoe UI', 10),
+                bg=color,
+                fg='white',
+                relief='flat',
+                cursor='hand2'
+            )
+            btn.pack(side="left", expand=True, fill="x", padx=5)
+            app.add_button_hover_effect(btn, color)
+        
+        self.window.bind("<Return>", lambda e: self.commit())
+        self.window.bind("<Escape>", lambda e: self.cancel())
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.window.grab_set()
+    
+    def commit(self):
+        values = {}
+        try:
+            for key, spec, var in self._fields:
+                value = var.get()
+                if spec[0] == 'choice':
+                    value = next(choice for choice, text in spec[1] if text == value)
+                values[key] = value
+        except tk.TclError:
+            messagebox.showerror("❌ Error", "Nilai harus berupa bilangan bulat.", parent=self.window)
+            return
+        self.cancel()
+        self.on_commit(values)
+    
+    def cancel(self):
+        self.window.grab_release()
+        self.window.destroy()
+
+
+class FolderBrowser:
+    """Window of thumbnails of the images in a folder; clicking one opens it
+    
+    Thumbnails come from citra_thumbs: cached ones are read first, the rest
+    are decoded at reduced resolution on background threads. Finished
+    thumbnails are queued and picked up on the Tk thread by polling with
+    root.after, at most BATCH per tick so scrolling stays smooth.
+    """
+    POLL_MS = 50
+    BATCH = 48
+    PAD = 10
+    
+    def __init__(self, app):
+        self.app = app
+        colors = app.colors
+        self.colors = colors
+        self.cell_w = citra_thumbs.THUMB_SIZE + 2 * self.PAD
+        self.cell_h = citra_thumbs.THUMB_SIZE + 3 * self.PAD + 14
+        self.paths = []
+        self._index = {}  # path -> position in paths
+        self.photos = {}  # path -> PhotoImage, kept alive while shown
+        self._results = None
+        self._cancel = None
+        self._columns = 0
+        self._loaded = 0
+        self._start = 0.0
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("📁 Jelajah Folder")
+        self.window.geometry("760x600")
+        self.window.configure(bg=colors['bg_secondary'])
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        bar = tk.Frame(self.window, bg=colors['bg_secondary'])
+        bar.pack(fill="x", padx=10, pady=8)
+        btn = tk.Button(
+            bar,
+            text="📁 Pilih Folder",
+            command=self.choose_folder,
+            font=('Segoe UI', 10),
+            bg='#6B728E',
+            fg='white',
+            relief='flat',
+            cursor='hand2'
+        )
+        btn.pack(side="left")
+        app.add_button_hover_effect(btn, '#6B728E')
+        self.status = tk.Label(
+            bar,
+            text="Pilih folder untuk melihat thumbnail",
+            font=('Segoe UI', 10),
+            bg=colors['bg_secondary'],
+            fg=colors['text_secondary'],
+            anchor="w"
+        )
+        self.status.pack(side="left", fill="x", expand=True, padx=10)
+        
+        body = tk.Frame(self.window, bg=colors['bg_secondary'])
+        body.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.canvas = tk.Canvas(body, bg=colors['bg_primary'], highlightthickness=0)
+        scrollbar = ttk.Scrollbar(body, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.bind("<Configure>", lambda e: self._layout())
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+    
+    def choose_folder(self):
+        folder = filedialog.askdirectory(title="Pilih Folder Gambar", parent=self.window)
+        if folder:
+            self.browse(folder)
+    
+    def browse(self, folder):
+        """Show the images of folder, replacing the current listing"""
+        try:
+            paths = citra_thumbs.list_images(folder)
+        except ValueError as e:
+            messagebox.showerror("❌ Error", str(e), parent=self.window)
+            return
+        self._stop()
+        self.paths = paths
+        self._index = {path: index for index, path in enumerate(paths)}
+        self.photos = {}
+        self.canvas.delete("all")
+        self._columns = 0
+        for index, path in enumerate(paths):
+            tag = f"thumb{index}"
+            self.canvas.create_rectangle(0, 0, 0, 0, outline=self.colors['bg_tertiary'],
+                                         tags=(tag, f"{tag}.frame"))
+            self.canvas.create_image(0, 0, anchor="center", tags=(tag, f"{tag}.image"))
+            name = os.path.basename(path)
+            self.canvas.create_text(0, 0, text=name if len(name) <= 20 else name[:17] + "...",
+                                    fill=self.colors['text_secondary'], font=('Segoe UI', 8),
+                                    tags=(tag, f"{tag}.label"))
+            self.canvas.tag_bind(tag, "<Button-1>", lambda e, p=path: self.app.open_image(p))
+        self.canvas.yview_moveto(0)
+        self._layout()
+        
+        self._loaded = 0
+        self._start = time.perf_counter()
+        self.status.config(text=f"{len(paths)} gambar di {os.path.basename(folder) or folder}")
+        if not paths:
+            return
+        
+        cache = self.app.thumbnail_cache
+        cancel = threading.Event()
+        self._cancel = cancel
+        results = self._results = queue.Queue()
+        threading.Thread(
+            target=citra_thumbs.load_thumbnails,
+            args=(paths, cache, lambda path, thumb: results.put((path, thumb)), cancel),
+            name="citra-thumbs-scan",
+            daemon=True
+        ).start()
+        self._poll(results, cache)
+    
+    def _layout(self):
+        """Place the thumbnail cells in as many columns as fit the window"""
+        columns = max(1, self.canvas.winfo_width() // self.cell_w)
+        if columns == self._columns:
+            return
+        self._columns = columns
+        half = citra_thumbs.THUMB_SIZE // 2
+        for index in range(len(self.paths)):
+            tag = f"thumb{index}"
+            x = (index % columns) * self.cell_w + self.cell_w // 2
+            y = (index // columns) * self.cell_h + self.PAD + half
+            self.canvas.coords(f"{tag}.frame", x - half - 4, y - half - 4, x + half + 4, y + half + 4)
+            self.canvas.coords(f"{tag}.image", x, y)
+            self.canvas.coords(f"{tag}.label", x, y + half + self.PAD + 4)
+        rows = (len(self.paths) + columns - 1) // columns
+        self.canvas.configure(scrollregion=(0, 0, columns * self.cell_w, rows * self.cell_h))
+    
+    def _poll(self, results, cache):
+        if results is not self._results:
+            return  # Another folder was opened meanwhile
+        for _ in range(self.BATCH):
+            try:
+                path, thumb = results.get_nowait()
+            except queue.Empty:
+                break
+            self._loaded += 1
+            tag = f"thumb{self._index[path]}"
+            if thumb is None:
+                self.canvas.itemconfig(f"{tag}.label", fill=self.colors['warning'], text="⚠ tidak terbaca")
+                continue
+            photo = ImageTk.PhotoImage(thumb, master=self.window)
+            self.photos[path] = photo
+            self.canvas.itemconfig(f"{tag}.image", image=photo)
+        
+        elapsed = time.perf_counter() - self._start
+        self.status.config(
+            text=f"{self._loaded}/{len(self.paths)} thumbnail  "
+                 f"(cache {cache.hits}, didekode {cache.misses})  {elapsed:.1f} s"
+        )
+        if self._loaded < len(self.paths):
+            # Scheduled on the root: it outlives this window
+            self.app.root.after(self.POLL_MS, self._poll, results, cache)
+    
+    def _stop(self):
+        if self._cancel is not None:
+            self._cancel.set()
+            self._cancel = None
+        self._results = None
+    
+    def close(self):
+        self._stop()
+        self.app.folder_browser = None
+        self.window.destroy()
+
+
+class HistogramPanel:
+    """Histogram of the input and the processed image, embedded in the window
+    
+    Histograms are cached per image object (held by weak reference, so the
+    cache never keeps an old image alive) and are only recomputed when a
+    panel shows a different image. During live previews the result panel
+    shows the proxy, so its histogram comes from the proxy too. matplotlib
+    is imported when the panel is first shown and redraws are coalesced.
+    """
+    REDRAW_MS = 60
+    CACHE_ENTRIES = 6
+    ROLES = (('original', "Gambar Asli"), ('processed', "Hasil Pemrosesan"))
+    CHANNEL_COLORS = ('#bac2de', '#89b4fa', '#a6e3a1', '#f38ba8')  # gray, B, G, R
+    
+    def __init__(self, root, parent, colors):
+        self.root = root
+        self.parent = parent
+        self.colors = colors
+        self.visible = False
+        self._images = {role: None for role, _ in self.ROLES}
+        self._stale = set()  # Roles whose plot does not match _images yet
+        self._cache = OrderedDict()  # id(image) -> (weakref to image, histogram)
+        self._lock = threading.Lock()
+        self._canvas = None
+        self._axes = {}
+        self._lines = {}
+        self._redraw = None
+    
+    def histogram(self, image):
+        """Histogram of image, computed once per image object (thread-safe)"""
+        key = id(image)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0]() is image:
+                self._cache.move_to_end(key)
+                return cached[1]
+        hist = engine.compute_histogram(image)
+        with self._lock:
+            self._cache[key] = (weakref.ref(image), hist)
+            while len(self._cache) > self.CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        return hist
+    
+    def prefetch(self, image):
+        """Compute the histogram ahead of display if the panel is shown; never raises
+        
+        Called from background jobs, which must not fail because of it.
+        """
+        if not self.visible:
+            return
+        try:
+            self.histogram(image)
+        except Exception:
+            pass  # Drawn without this image's histogram
+    
+    def set_image(self, role, image):
+        """Record the image now shown for role and redraw if it changed"""
+        if self._images[role] is image:
+            return
+        self._images[role] = image
+        self._stale.add(role)
+        if self.visible:
+            self._schedule_draw()
+    
+    def toggle(self):
+        """Show or hide the panel; returns whether it is now visible"""
+        if self.visible:
+            self.parent.grid_remove()
+            self.visible = False
+            return False
+        if self._canvas is None:
+            self._build()
+        self.parent.grid()
+        self.visible = True
+        self._schedule_draw()
+        return True
+    
+    def _build(self):
+        import matplotlib.style
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        with matplotlib.style.context('dark_background'):
+            figure = Figure(figsize=(10, 1.8), dpi=100, facecolor=self.colors['bg_secondary'])
+            for i, (role, title) in enumerate(self.ROLES):
+                ax = figure.add_subplot(1, len(self.ROLES), i + 1)
+                ax.set_facecolor(self.colors['bg_tertiary'])
+                ax.set_title(title, fontsize=9)
+                ax.set_xlim(0, 255)
+                ax.tick_params(labelsize=7)
+                ax.grid(True, alpha=0.3)
+                self._axes[role] = ax
+                self._lines[role] = [ax.plot(range(256), [0] * 256, color=color, linewidth=1)[0]
+                                     for color in self.CHANNEL_COLORS]
+            figure.tight_layout()
+        self._canvas = FigureCanvasTkAgg(figure, master=self.parent)
+        self._canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=(0, 10))
+    
+    def _schedule_draw(self):
+        if self._redraw is None:
+            self._redraw = self.root.after(self.REDRAW_MS, self._draw)
+    
+    def _draw(self):
+        self._redraw = None
+        if not self.visible:
+            return
+        for role in self._stale:
+            image = self._images[role]
+            try:
+                hist = self.histogram(image) if image is not None else None
+            except Exception:
+                hist = None
+            lines = self._lines[role]
+            if hist is None:
+                shown = []
+            elif len(hist) == 1:
+                shown = [(lines[0], hist[0])]
+            else:
+                shown = list(zip(lines[1:], hist[:3]))
+            for line in lines:
+                line.set_visible(False)
+            for line, counts in shown:
+                line.set_ydata(counts)
+                line.set_visible(True)
+            ax = self._axes[role]
+            ax.relim(visible_only=True)
+            ax.autoscale_view(scalex=False)
+        self._stale.clear()
+        self._canvas.draw_idle()
+
 
 class ImageProcessorApp:
-    def __init__(self, root):
+    # Maximum magnification in screen pixels per image pixel
+    MAX_PIXEL_SCALE = 32
+    
+    def __init__(self, root, cache_bytes=None, history_bytes=None, trace_path=None, workspace_bytes=None,
+                 strip_executor=None):
         self.root = root
+        self.trace_path = trace_path  # Session trace is exported here on exit
         self.root.title("Aplikasi Pengolahan Citra Digital - F.A.I.T Vision")
         self.root.geometry("1400x900")
         self.root.configure(bg='#1e1e2e')
-        self.root.state('zoomed')  # Maximized window
+        try:
+            self.root.state('zoomed')  # Maximized window
+        except tk.TclError:
+            self.root.attributes('-zoomed', True)  # X11 has no 'zoomed' state
         self.zoom_level = 1.0
-        self.bind_zoom_events()
+        self.view_center = None  # Full-resolution pixel at the panel centre
+        self._pan_start = None
+        self._view_redraw = None
         
         # Style configuration
         self.setup_styles()
@@ -25,23 +693,103 @@ class ImageProcessorApp:
         self.original_image = None
         self.processed_image = None
         self.current_image_path = None
-        self.second_image = None
+        self.second_image = None  # engine.MatchedImage of the second file
         self.second_image_path = None
+        self._loading = False
+        
+        # Grayscale/binary intermediates of original_image, keyed by image_generation.
+        # The cache, pipeline and history are created on first use (see the
+        # properties below) so that startup does not load OpenCV/numpy.
+        self.cache_bytes = cache_bytes
+        self._derived_cache = None
+        self.image_generation = 0
+        
+        # Preview pyramid, last rendered state and viewport per display panel
+        self._pyramids = {}
+        self._display_state = {}
+        self._viewports = {}
+        self._stashed_pyramid = None
+        
+        # Operation chain; in chain mode each operation extends it
+        self._pipeline = None
+        self.strip_executor = strip_executor  # Pipeline runs split into strips when set
+        self.chain_mode = tk.BooleanVar(value=False)
+        self.history_bytes = history_bytes
+        self._history = None
+        
+        # Open documents; inactive ones may be spilled to disk by the workspace
+        self.workspace_bytes = workspace_bytes
+        self._workspace = None
+        self.document = None
+        
+        # Folder browser window and its thumbnail cache, created on first use
+        self.folder_browser = None
+        self._thumbnail_cache = None
+        
+        # Exports run on their own thread so new operations never drop them
+        self._exporter = None
+        self.export_options = None
+        
+        # Video jobs get their own worker for the same reason
+        self._video_worker = None
+        
+        # Background worker so long operations never block the Tk main loop
+        self.worker = BackgroundWorker(self.root, self.show_progress)
         
         self.create_widgets()
+        self.bind_zoom_events()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    @property
+    def derived_cache(self):
+        if self._derived_cache is None:
+            self._derived_cache = engine.DerivedImageCache(self.cache_bytes or engine.DEFAULT_CACHE_BYTES)
+        return self._derived_cache
+    
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            self._pipeline = citra_pipeline.Pipeline(executor=self.strip_executor)
+        return self._pipeline
+    
+    @pipeline.setter
+    def pipeline(self, pipeline):
+        pipeline.executor = self.strip_executor
+        self._pipeline = pipeline
+    
+    @property
+    def history(self):
+        if self._history is None:
+            self._history = citra_pipeline.PipelineHistory(
+                self.history_bytes or citra_pipeline.DEFAULT_HISTORY_BYTES)
+        return self._history
+    
+    @property
+    def thumbnail_cache(self):
+        if self._thumbnail_cache is None:
+            self._thumbnail_cache = citra_thumbs.ThumbnailCache()
+        return self._thumbnail_cache
+    
+    @property
+    def workspace(self):
+        if self._workspace is None:
+            self._workspace = citra_workspace.Workspace(
+                self.workspace_bytes or citra_workspace.DEFAULT_WORKSPACE_BYTES)
+        return self._workspace
+    
     def bind_zoom_events(self):
-        """Bind mouse wheel events for zooming"""
+        """Bind mouse wheel events for zooming and dragging for panning"""
         if hasattr(self, 'processed_panel'):
             self.processed_panel.bind("<MouseWheel>", self.zoom_image)
             self.processed_panel.bind("<Button-4>", self.zoom_image)  # Linux zoom in
             self.processed_panel.bind("<Button-5>", self.zoom_image)  # Linux zoom out
+            self.processed_panel.bind("<ButtonPress-1>", self.start_pan)
+            self.processed_panel.bind("<B1-Motion>", self.pan_image)
+            self.processed_panel.bind("<ButtonRelease-1>", self.end_pan)
+            self.processed_panel.bind("<Double-Button-1>", lambda e: self.reset_zoom())
 
     def setup_styles(self):
         """Setup modern styling"""
-        style.use('dark_background')
-        
         # Configure ttk styles
         self.style = ttk.Style()
         self.style.theme_use('clam')
@@ -118,6 +866,9 @@ class ImageProcessorApp:
         
         # Advanced Filters
         self.create_advanced_filters_panel(control_frame)
+        
+        # Operation chain
+        self.create_pipeline_panel(control_frame)
     
     def create_file_operations_panel(self, parent):
         """File operations panel"""
@@ -131,10 +882,21 @@ class ImageProcessorApp:
         )
         frame.grid(row=0, column=0, padx=10, pady=5, sticky="nsew")
         
+        # Open documents (Ctrl+PgUp / Ctrl+PgDn to flip between them)
+        self.document_var = tk.StringVar(value="")
+        self.document_selector = ttk.Combobox(frame, textvariable=self.document_var, state="readonly")
+        self.document_selector.pack(pady=(8, 0), padx=10, fill="x")
+        self.document_selector.bind("<<ComboboxSelected>>", self._on_document_selected)
+        self.root.bind("<Control-Next>", lambda e: self.cycle_document(1))
+        self.root.bind("<Control-Prior>", lambda e: self.cycle_document(-1))
+        
         buttons = [
             ("📂 Buka Gambar Utama", self.load_image, '#6B728E'),
             ("📂 Buka Gambar Kedua", self.load_second_image, '#6B728E'),
+            ("🖼 Jelajah Folder", self.browse_folder, '#6B728E'),
             ("💾 Simpan Hasil", self.save_processed_image, '#6B728E'),
+            ("🎞 Proses Video", self.process_video, '#6B728E'),
+            ("✖ Tutup Dokumen", self.close_document, '#6B728E'),
             ("🔄 Reset Gambar", self.reset_image, '#6B728E')
         ]
         
@@ -157,8 +919,9 @@ class ImageProcessorApp:
     def reset_zoom(self):
         """Reset zoom level to 1.0"""
         self.zoom_level = 1.0
+        self.view_center = None
         if self.processed_image is not None:
-            self.display_image(self.processed_image, self.processed_panel)
+            self._display_processed()
         self.update_status("🔍 Zoom direset ke level normal")
     
     def create_basic_processing_panel(self, parent):
@@ -178,7 +941,8 @@ class ImageProcessorApp:
             ("⚫ Citra Biner", self.convert_to_binary, '#6c7086'),
             ("⚫ Operasi Aritmatika (Tambah Kecerahan)", self.arithmetic_addition, '#6c7086'),
             ("⚫ Operasi Logika (AND)", self.logic_and_operation, "#6c7086"),
-            ("⚫ Histogram (Gambar Input)", self.show_histogram, '#6c7086')
+            ("⚫ Logika Banyak Gambar", self.logic_multiple_images, "#6c7086"),
+            ("⚫ Histogram", self.show_histogram, '#6c7086')
         ]
         
         for text, command, color in buttons:
@@ -212,7 +976,9 @@ class ImageProcessorApp:
         buttons = [
             ("📐 Edge Detection", self.edge_detection, '#6B728E'),
             ("⚫ Dilasi Diagonal", self.dilation_diagonal, '#6B728E'),
-            ("⚫ Dilasi Horizontal", self.dilation_horizontal, '#6B728E')
+            ("⚫ Dilasi Horizontal", self.dilation_horizontal, '#6B728E'),
+            ("⚫ Erosi", self.morphological_erosion, '#6B728E'),
+            ("⚙ Morfologi...", self.morphology, '#6B728E')
         ]
         
         for text, command, color in buttons:
@@ -231,8 +997,75 @@ class ImageProcessorApp:
             btn.pack(pady=8, padx=10, fill="x")
             self.add_button_hover_effect(btn, color)
         
-        # Configure grid weights
+    def create_pipeline_panel(self, parent):
+        """Operation chain (pipeline) panel"""
+        frame = tk.LabelFrame(
+            parent,
+            text="🔗 Rantai Operasi",
+            font=('Segoe UI', 11, 'bold'),
+            bg=self.colors['bg_secondary'],
+            fg=self.colors['text_primary'],
+            bd=2
+        )
+        frame.grid(row=0, column=3, padx=10, pady=5, sticky="nsew")
+        
+        tk.Checkbutton(
+            frame,
+            text="Terapkan pada hasil sebelumnya",
+            variable=self.chain_mode,
+            font=('Segoe UI', 10),
+            bg=self.colors['bg_secondary'],
+            fg=self.colors['text_primary'],
+            selectcolor=self.colors['bg_tertiary'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        ).pack(padx=10, pady=(8, 4), anchor="w")
+        
+        self.pipeline_list = tk.Listbox(
+            frame,
+            height=5,
+            font=('Segoe UI', 10),
+            bg=self.colors['bg_tertiary'],
+            fg=self.colors['text_primary'],
+            selectbackground=self.colors['accent'],
+            relief='flat',
+            activestyle='none'
+        )
+        self.pipeline_list.pack(padx=10, pady=4, fill="both", expand=True)
+        self.pipeline_list.bind("<Double-Button-1>", lambda e: self.edit_pipeline_step())
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Z>", lambda e: self.redo())
+        
+        button_frame = tk.Frame(frame, bg=self.colors['bg_secondary'])
+        button_frame.pack(padx=10, pady=(4, 8), fill="x")
+        buttons = [
+            ("▶ Jalankan", self.run_pipeline),
+            ("✏ Ubah", self.edit_pipeline_step),
+            ("🗑 Hapus", self.remove_pipeline_step),
+            ("💾 Simpan Resep", self.save_recipe),
+            ("📂 Muat Resep", self.load_recipe),
+            ("↶ Undo", self.undo),
+            ("↷ Redo", self.redo),
+        ]
+        for i, (text, command) in enumerate(buttons):
+            btn = tk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                font=('Segoe UI', 9),
+                bg='#6B728E',
+                fg='white',
+                relief='flat',
+                cursor='hand2'
+            )
+            btn.grid(row=i // 3, column=i % 3, padx=2, pady=2, sticky="ew")
+            self.add_button_hover_effect(btn, '#6B728E')
         for i in range(3):
+            button_frame.columnconfigure(i, weight=1)
+        
+        # Configure grid weights
+        for i in range(4):
             parent.columnconfigure(i, weight=1)
     
     def create_image_display_area(self, parent):
@@ -306,6 +1139,19 @@ class ImageProcessorApp:
         )
         self.processed_panel.pack(padx=15, pady=15, fill="both", expand=True)
         
+        # Histogram panel, hidden until toggled
+        histogram_frame = tk.LabelFrame(
+            display_frame,
+            text="📊 Histogram",
+            font=('Segoe UI', 12, 'bold'),
+            bg=self.colors['bg_secondary'],
+            fg=self.colors['text_primary'],
+            bd=2
+        )
+        histogram_frame.grid(row=1, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="nsew")
+        histogram_frame.grid_remove()
+        self.histogram = HistogramPanel(self.root, histogram_frame, self.colors)
+        
         # Configure grid weights
         for i in range(3):
             display_frame.columnconfigure(i, weight=1)
@@ -328,7 +1174,21 @@ class ImageProcessorApp:
             font=('Segoe UI', 10),
             anchor="w"
         )
-        status_label.pack(fill="x", padx=15, pady=10)
+        status_label.pack(side="left", fill="x", expand=True, padx=15, pady=10)
+        
+        cancel_btn = tk.Button(
+            status_frame,
+            text="⛔ Batal",
+            command=self.cancel_operation,
+            font=('Segoe UI', 9),
+            bg=self.colors['bg_tertiary'],
+            fg='white',
+            relief='flat',
+            cursor='hand2'
+        )
+        cancel_btn.pack(side="right", padx=10, pady=6)
+        self.add_button_hover_effect(cancel_btn, self.colors['bg_tertiary'])
+        self.root.bind("<Escape>", self.cancel_operation)
     
     def add_button_hover_effect(self, button, original_color):
         """Add hover effect to buttons"""
@@ -359,6 +1219,10 @@ class ImageProcessorApp:
         self.status_var.set(f"🔄 {message}")
         self.root.update_idletasks()
     
+    def show_progress(self, message):
+        """Show background job progress without forcing a redraw"""
+        self.status_var.set(message)
+    
     def on_window_resize(self, event):
         """Handle window resize"""
         if event.widget == self.root:
@@ -366,6 +1230,13 @@ class ImageProcessorApp:
     
     def _check_image_loaded(self):
         """Check if main image is loaded"""
+        if self._loading:
+            messagebox.showinfo(
+                "⏳ Memuat",
+                "Gambar utama masih dimuat. Silakan tunggu sebentar.",
+                parent=self.root
+            )
+            return False
         if self.original_image is None:
             messagebox.showerror(
                 "❌ Error", 
@@ -375,95 +1246,298 @@ class ImageProcessorApp:
             return False
         return True
     
-    def dilation_diagonal(self):
-        """Dilasi dengan Structuring Element berbentuk diagonal"""
-        if not self._check_image_loaded():
-            return
-        try:
-            # Convert to grayscale and threshold if needed
-            if len(self.original_image.shape) == 3:
-                gray = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2GRAY)
-                _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+    def _invalidate_derived(self):
+        """Forget cached intermediates of the previous original_image"""
+        self.image_generation += 1
+        self.derived_cache.invalidate()
+    
+    def _run_operation(self, label, func, success_message, error_message, step=None,
+                       record_history=True):
+        """Run func(cancel_event) on the background worker and show its result
+        
+        step is the (name, params) pipeline node the operation stands for. In
+        chain mode it is appended to the pipeline and only that node is
+        computed from the previous result; otherwise it starts a new chain.
+        The resulting pipeline state is recorded for undo unless
+        record_history is False.
+        """
+        if step is not None:
+            if self.chain_mode.get() and len(self.pipeline):
+                self.pipeline.append(*step)
+                func = self.pipeline.run
+                label = f"{label} (langkah {len(self.pipeline)})"
             else:
-                _, binary = cv2.threshold(self.original_image, 127, 255, cv2.THRESH_BINARY)
-            
-            # Define diagonal kernel
-            kernel_diag = np.array([[1, 0, 1], 
-                                [0, 1, 0], 
-                                [1, 0, 1]], dtype=np.uint8)
-            
-            # Apply dilation
-            dilated = cv2.dilate(binary, kernel_diag, iterations=1)
-            
-            self.processed_image = dilated
-            self.display_image(dilated, self.processed_panel)
-            self.update_status("✅ Dilasi dengan kernel diagonal selesai")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal melakukan dilasi diagonal:\n{str(e)}")
-
-    def dilation_horizontal(self):
-        """Dilasi dengan Structuring Element berbentuk horizontal"""
-        if not self._check_image_loaded():
+                self.pipeline.reset([step])
+                func = self._priming(func, self.pipeline, self.pipeline.revision)
+        
+        trace_mark = trace.mark()
+        
+        def job(cancel):
+            # Build the preview pyramid (and histogram, if shown) off the Tk thread too
+            with trace.span('operasi', label=label):
+                result = func(cancel)
+            self.histogram.prefetch(result)
+            return result, engine.build_preview_pyramid(result)
+        
+        def on_done(outcome):
+            result, pyramid = outcome
+            self.processed_image = result
+            self._stashed_pyramid = None
+            self.zoom_level = 1.0  # Reset zoom
+            self.view_center = None
+            self._get_preview_pyramid(result, self.processed_panel, pyramid)
+            self._display_processed()
+            self._refresh_pipeline_view()
+            if record_history:
+                self.history.record(self.pipeline.step_specs(), result)
+            self.update_status(self._with_breakdown(success_message, trace_mark))
+        
+        def on_error(e):
+            messagebox.showerror("❌ Error", f"{error_message}:\n{str(e)}", parent=self.root)
+            self.update_status(f"❌ {error_message}")
+        
+        self.worker.submit(label, job, on_done, on_error)
+    
+    @staticmethod
+    def _with_breakdown(message, trace_mark):
+        """Append the traced stage timings since trace_mark, when tracing is on"""
+        if not trace.is_enabled():
+            return message
+        return f"{message}  ⏱ {trace.format_breakdown(trace.events_since(trace_mark))}"
+    
+    @staticmethod
+    def _priming(func, pipeline, revision):
+        """Wrap func so its result also becomes the first pipeline step's output"""
+        def primed(cancel):
+            result = func(cancel)
+            pipeline.prime(0, result, revision)
+            return result
+        return primed
+    
+    # === PIPELINE ===
+    
+    def _reset_history(self):
+        """Start a new undo history whose first state is the unprocessed image"""
+        self.history.clear()
+        if self.original_image is not None:
+            self.history.record([])
+    
+    def _restore_history_state(self, specs, label):
+        """Show a recorded pipeline state, recomputing from the nearest checkpoint"""
+        if not specs:
+            # Back to the unprocessed image
+            self.worker.cancel()
+            self.pipeline.reset()
+            self.processed_image = None
+            self.processed_panel.config(image='', text="Hasil pemrosesan akan muncul di sini")
+            self.processed_panel.image = None
+            self._forget_preview(self.processed_panel)
+            self._refresh_pipeline_view()
+            self.update_status(f"{label}: gambar belum diproses")
             return
-        try:
-            # Convert to grayscale and threshold if needed
-            if len(self.original_image.shape) == 3:
-                gray = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2GRAY)
-                _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
-            else:
-                _, binary = cv2.threshold(self.original_image, 127, 255, cv2.THRESH_BINARY)
-            
-            # Define horizontal kernel
-            kernel_horizontal = np.array([[0, 0, 0], 
-                                        [1, 1, 1], 
-                                        [0, 0, 0]], dtype=np.uint8)
-            
-            # Apply dilation
-            dilated = cv2.dilate(binary, kernel_horizontal, iterations=1)
-            
-            self.processed_image = dilated
-            self.display_image(dilated, self.processed_panel)
-            self.update_status("✅ Dilasi dengan kernel horizontal selesai")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal melakukan dilasi horizontal:\n{str(e)}")
-
-    def _check_two_images_loaded(self):
-        """Check if both images are loaded"""
-        if self.original_image is None or self.second_image is None:
-            messagebox.showerror(
-                "❌ Error", 
-                "Diperlukan dua gambar untuk operasi ini.\nPastikan gambar utama dan gambar kedua sudah dimuat.",
+        
+        rebuild = self.history.restore(self.pipeline, specs)
+        self._refresh_pipeline_view()
+        self._run_operation(
+            label,
+            rebuild,
+            f"{label}: {self.pipeline.describe()}",
+            f"Gagal melakukan {label.lower()}",
+            record_history=False
+        )
+    
+    def undo(self):
+        """Undo the last operation"""
+        specs = self.history.undo()
+        if specs is None:
+            self.update_status("↶ Tidak ada yang bisa di-undo")
+            return
+        self._restore_history_state(specs, "↶ Undo")
+    
+    def redo(self):
+        """Redo the last undone operation"""
+        specs = self.history.redo()
+        if specs is None:
+            self.update_status("↷ Tidak ada yang bisa di-redo")
+            return
+        self._restore_history_state(specs, "↷ Redo")
+    
+    # Step parameters that can be tuned from the pipeline list
+    TUNABLE_PARAMS = {
+        'binary': ('threshold', 127, "Nilai threshold (0-255):"),
+        'brightness': ('value', 50, "Nilai penambah kecerahan (0-255):"),
+        'dilate': ('threshold', 127, "Threshold sebelum dilasi (0-255):"),
+    }
+    
+    def _refresh_pipeline_view(self):
+        """Show the pipeline steps in the list"""
+        self.pipeline_list.delete(0, tk.END)
+        for i, step in enumerate(self.pipeline.steps, start=1):
+            self.pipeline_list.insert(tk.END, f"{i}. {step.describe()}")
+    
+    def _selected_pipeline_step(self):
+        selection = self.pipeline_list.curselection()
+        if not selection:
+            messagebox.showwarning(
+                "⚠ Peringatan",
+                "Pilih langkah pada daftar rantai operasi terlebih dahulu.",
                 parent=self.root
             )
-            return False
-        if self.original_image.shape != self.second_image.shape:
+            return None
+        return selection[0]
+    
+    def run_pipeline(self, success_message=None):
+        """Run the whole pipeline on the current image (cached steps are reused)"""
+        if not self._check_image_loaded():
+            return
+        if not len(self.pipeline):
+            messagebox.showwarning("⚠ Peringatan", "Rantai operasi masih kosong.", parent=self.root)
+            return
+        if any(step.needs_second for step in self.pipeline.steps) and not self._check_two_images_loaded():
+            return
+        self._run_operation(
+            "Menjalankan rantai operasi",
+            self.pipeline.run,
+            success_message or f"✅ Rantai operasi selesai: {self.pipeline.describe()}",
+            "Gagal menjalankan rantai operasi"
+        )
+    
+    def edit_pipeline_step(self):
+        """Tune the parameter of a step; only it and later steps are recomputed"""
+        index = self._selected_pipeline_step()
+        if index is None or not self._check_image_loaded():
+            return
+        step = self.pipeline.steps[index]
+        if step.name not in self.TUNABLE_PARAMS:
+            messagebox.showinfo("ℹ Info", "Langkah ini tidak memiliki parameter yang dapat diubah.",
+                                parent=self.root)
+            return
+        
+        key, default, label = self.TUNABLE_PARAMS[step.name]
+        proxy = self._preview_proxy()
+        second = self.second_image
+        specs = self.pipeline.step_specs()
+        
+        def preview(value):
+            # Replay the whole chain on the proxy with the new value; the
+            # second image's proxy-sized variant is computed only once
+            specs[index][1][key] = value
+            return engine.apply_operations(proxy, specs, second=second)
+        
+        def commit(value):
+            self.pipeline.set_params(index, {key: value})
+            self._refresh_pipeline_view()
+            self.run_pipeline(f"✅ Langkah {index + 1} diperbarui: {self.pipeline.describe()}")
+        
+        LivePreviewDialog(self, f"Ubah {step.describe()}", label,
+                          initial=step.params.get(key, default),
+                          preview=preview, on_commit=commit)
+    
+    def remove_pipeline_step(self):
+        """Remove a step and recompute from that point"""
+        index = self._selected_pipeline_step()
+        if index is None:
+            return
+        self.pipeline.remove(index)
+        self._refresh_pipeline_view()
+        if len(self.pipeline) and self.original_image is not None:
+            self.run_pipeline()
+    
+    def save_recipe(self):
+        """Save the pipeline as a JSON recipe"""
+        if not len(self.pipeline):
+            messagebox.showwarning("⚠ Peringatan", "Rantai operasi masih kosong.", parent=self.root)
+            return
+        path = filedialog.asksaveasfilename(
+            title="Simpan Resep",
+            defaultextension=".json",
+            filetypes=[("Resep JSON", "*.json"), ("All files", ".")],
+            parent=self.root
+        )
+        if not path:
+            return
+        try:
+            self.pipeline.save(path)
+            self.update_status(f"💾 Resep disimpan: {os.path.basename(path)}")
+        except Exception as e:
+            messagebox.showerror("❌ Error", f"Gagal menyimpan resep:\n{str(e)}", parent=self.root)
+            self.update_status("❌ Gagal menyimpan resep")
+    
+    def load_recipe(self):
+        """Load a JSON recipe and run it on the current image"""
+        path = filedialog.askopenfilename(
+            title="Muat Resep",
+            filetypes=[("Resep JSON", "*.json"), ("All files", ".")],
+            parent=self.root
+        )
+        if not path:
+            return
+        try:
+            pipeline = citra_pipeline.Pipeline.load(path)
+        except Exception as e:
+            messagebox.showerror("❌ Error", f"Gagal memuat resep:\n{str(e)}", parent=self.root)
+            self.update_status("❌ Gagal memuat resep")
+            return
+        
+        self.worker.cancel()
+        pipeline.set_source(self.original_image, self.second_image)
+        self.pipeline = pipeline
+        self.chain_mode.set(True)
+        self._refresh_pipeline_view()
+        self.update_status(f"📂 Resep dimuat: {os.path.basename(path)}")
+        if self.original_image is not None and len(pipeline):
+            self.run_pipeline()
+    
+    def cancel_operation(self, event=None):
+        """Cancel the running background operation, else a running video"""
+        if self.worker.cancel():
+            self.update_status("⛔ Operasi dibatalkan")
+        elif self._video_worker is not None and self._video_worker.cancel():
+            self.update_status("⛔ Proses video dibatalkan")
+    
+    def dilation_diagonal(self):
+        """Dilasi dengan Structuring Element berbentuk diagonal"""
+        if not self._check_image_loaded():
+            return
+        image, source = self.original_image, self.image_generation
+        cache = self.derived_cache
+        self._run_operation(
+            "Dilasi diagonal",
+            lambda cancel: engine.dilate_binary(cache.binary_bits(source, image, 127), 'diagonal').to_array(),
+            "✅ Dilasi dengan kernel diagonal selesai",
+            "Gagal melakukan dilasi diagonal",
+            step=('dilate', {'kernel': 'diagonal'})
+        )
+
+    def dilation_horizontal(self):
+        """Dilasi dengan Structuring Element berbentuk horizontal"""
+        if not self._check_image_loaded():
+            return
+        image, source = self.original_image, self.image_generation
+        cache = self.derived_cache
+        self._run_operation(
+            "Dilasi horizontal",
+            lambda cancel: engine.dilate_binary(cache.binary_bits(source, image, 127), 'horizontal').to_array(),
+            "✅ Dilasi dengan kernel horizontal selesai",
+            "Gagal melakukan dilasi horizontal",
+            step=('dilate', {'kernel': 'horizontal'})
+        )
+
+    def _check_two_images_loaded(self):
+        """Check if both images are loaded"""
+        if self.original_image is None or self.second_image is None:
             messagebox.showerror(
                 "❌ Error", 
-                "Ukuran atau jumlah channel kedua gambar harus sama.",
+                "Diperlukan dua gambar untuk operasi ini.\nPastikan gambar utama dan gambar kedua sudah dimuat.",
                 parent=self.root
             )
             return False
+        # A second image of another size is resized to the main image by the engine
         return True
     
     def _load_image_with_pil_fallback(self, path):
         """Load image with PIL fallback"""
-        try:
-            img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
-            if img is None:
-                pil_img = Image.open(path)
-                if pil_img.mode == 'RGBA':
-                    pil_img = pil_img.convert('RGB')
-                elif pil_img.mode != 'RGB':
-                    pil_img = pil_img.convert('RGB')
-                img = np.array(pil_img)
-                img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-            if len(img.shape) == 3 and img.shape[2] == 4:
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-            return img
-        except Exception as e:
-            raise ValueError(f"Tidak dapat memuat gambar dari: {os.path.basename(path)}.\nError: {str(e)}")
+        return engine.load_image(path)
     
     def load_image(self):
         """Load main image"""
@@ -479,9 +1553,65 @@ class ImageProcessorApp:
         if not path:
             return
         
+        self.open_image(path)
+    
+    def browse_folder(self):
+        """Open the thumbnail browser, starting at the current image's folder"""
+        if self.folder_browser is not None:
+            self.folder_browser.window.lift()
+            return
+        self.folder_browser = FolderBrowser(self)
+        if self.current_image_path:
+            self.folder_browser.browse(os.path.dirname(self.current_image_path))
+        else:
+            self.folder_browser.choose_folder()
+    
+    def open_image(self, path):
+        """Load path as the main image
+        
+        A reduced-resolution decode (JPEG) is shown right away; the full
+        decode and its preview pyramid are built on the background worker.
+        """
+        # A file that is already open is switched to, not decoded again
+        for document in self.workspace.documents:
+            if document.path == path:
+                self.switch_document(document)
+                return
+        
+        # Results computed from the previous image are no longer wanted
+        self.worker.cancel()
+        name = os.path.basename(path)
+        
         try:
+            preview = engine.load_image_reduced(
+                path,
+                max(1, self.original_panel.winfo_width()),
+                max(1, self.original_panel.winfo_height())
+            )
+        except ValueError:
+            preview = None  # The full decode below reports the error
+        if preview is not None:
+            self.display_image(preview, self.original_panel)
+        
+        trace_mark = trace.mark()
+        
+        def load(cancel):
+            image = self._load_image_with_pil_fallback(path)
+            self.histogram.prefetch(image)
+            return image, engine.build_preview_pyramid(image)
+        
+        def on_done(outcome):
+            image, pyramid = outcome
+            self._loading = False
+            self._stash_document()
+            self.document = self.workspace.add(path, image)
+            self._refresh_document_selector()
             self.current_image_path = path
-            self.original_image = self._load_image_with_pil_fallback(path)
+            self.original_image = image
+            self._invalidate_derived()
+            self.pipeline.set_source(self.original_image, self.second_image)
+            self._reset_history()
+            self._get_preview_pyramid(image, self.original_panel, pyramid)
             self.display_image(self.original_image, self.original_panel)
             
             # Reset processed image
@@ -491,12 +1621,171 @@ class ImageProcessorApp:
                 text="Hasil pemrosesan akan muncul di sini"
             )
             self.processed_panel.image = None
+            self._forget_preview(self.processed_panel)
             
-            self.update_status(f"✅ Gambar utama dimuat: {os.path.basename(path)}")
-            
-        except Exception as e:
+            self.update_status(self._with_breakdown(f"✅ Gambar utama dimuat: {name}", trace_mark))
+        
+        def on_error(e):
+            self._loading_aborted()
             messagebox.showerror("❌ Error", f"Terjadi kesalahan saat memuat gambar:\n{str(e)}", parent=self.root)
             self.update_status("❌ Gagal memuat gambar utama")
+        
+        self._loading = True
+        self.worker.submit(f"Memuat {name}", load, on_done, on_error,
+                           on_cancel=self._loading_aborted)
+    
+    def _loading_aborted(self):
+        """Put the previous main image back after a failed or cancelled load"""
+        self._loading = False
+        if self.original_image is not None:
+            self.display_image(self.original_image, self.original_panel)
+        else:
+            self.original_panel.config(image='', text="Klik 'Buka Gambar Utama' untuk memulai")
+            self.original_panel.image = None
+            self._forget_preview(self.original_panel)
+    
+    # === DOCUMENTS ===
+    
+    def _stash_document(self):
+        """Hand the active document's result and steps to the workspace before leaving it"""
+        if self.document is None:
+            return
+        self.document.specs = self.pipeline.step_specs() if self.processed_image is not None else []
+        self.workspace.put(self.document, 'processed', self.processed_image)
+    
+    def _refresh_document_selector(self):
+        documents = self.workspace.documents if self._workspace is not None else []
+        self.document_selector['values'] = [f"{i + 1}. {d.name}" for i, d in enumerate(documents)]
+        if self.document in documents:
+            self.document_selector.current(documents.index(self.document))
+        else:
+            self.document_var.set("")
+    
+    def _on_document_selected(self, event=None):
+        index = self.document_selector.current()
+        if 0 <= index < len(self.workspace.documents):
+            self.switch_document(self.workspace.documents[index])
+    
+    def cycle_document(self, step):
+        """Switch to the next (step=1) or previous (step=-1) open document"""
+        documents = self.workspace.documents if self._workspace is not None else []
+        if len(documents) < 2:
+            return "break"
+        index = documents.index(self.document) if self.document in documents else 0
+        self.switch_document(documents[(index + step) % len(documents)])
+        return "break"
+    
+    def _workspace_status(self):
+        ws = self.workspace
+        index = ws.documents.index(self.document) + 1
+        return (f"{index}/{len(ws)} dokumen  💾 RAM {ws.nbytes / 2**20:.0f} MB, "
+                f"disk {ws.disk_bytes / 2**20:.0f} MB")
+    
+    def switch_document(self, document):
+        """Show another open document with its result and steps
+        
+        Arrays spilled by the workspace are paged back in from disk on the
+        background worker; nothing is decoded or recomputed.
+        """
+        if document is self.document:
+            return
+        previous = self.document
+        self.worker.cancel()
+        self._stash_document()
+        self.workspace.activate(document)
+        ws = self.workspace
+        
+        def load(cancel):
+            original = ws.get(document, 'original')
+            processed = ws.get(document, 'processed')
+            pyramids = (engine.build_preview_pyramid(original),
+                        engine.build_preview_pyramid(processed) if processed is not None else None)
+            self.histogram.prefetch(original)
+            return original, processed, pyramids
+        
+        def on_done(outcome):
+            original, processed, (pyramid, processed_pyramid) = outcome
+            self.document = document
+            self.current_image_path = document.path
+            self.original_image = original
+            self.processed_image = processed
+            self._invalidate_derived()
+            specs = document.specs if processed is not None else []
+            self.pipeline.reset(specs)
+            self.pipeline.set_source(original, self.second_image)
+            if specs:
+                self.pipeline.prime(len(specs) - 1, processed, self.pipeline.revision)
+            self._reset_history()
+            if specs:
+                self.history.record(specs)
+            
+            self._get_preview_pyramid(original, self.original_panel, pyramid)
+            self.display_image(original, self.original_panel)
+            if processed is not None:
+                self._get_preview_pyramid(processed, self.processed_panel, processed_pyramid)
+                self._display_processed()
+            else:
+                self.processed_panel.config(image='', text="Hasil pemrosesan akan muncul di sini")
+                self.processed_panel.image = None
+                self._forget_preview(self.processed_panel)
+            self._refresh_pipeline_view()
+            self._refresh_document_selector()
+            self.update_status(f"📄 {document.name} ({self._workspace_status()})")
+        
+        def restore_previous():
+            if previous is not None and previous in ws.documents:
+                # The panels still show it: the switch only changes them when done
+                ws.activate(previous)
+                self._refresh_document_selector()
+            else:
+                # Switching away from a closed document: it must not stay on screen
+                self.document = None
+                self._clear_document_view()
+                self.update_status("✖ Dokumen ditutup")
+        
+        def on_error(e):
+            restore_previous()
+            messagebox.showerror("❌ Error", f"Gagal membuka dokumen:\n{str(e)}", parent=self.root)
+            self.update_status("❌ Gagal berpindah dokumen")
+        
+        self.worker.submit(f"Membuka {document.name}", load, on_done, on_error,
+                           on_cancel=restore_previous)
+    
+    def close_document(self):
+        """Close the active document; the next open one is shown instead"""
+        if self.document is None:
+            messagebox.showwarning("⚠ Peringatan", "Tidak ada dokumen yang terbuka.", parent=self.root)
+            return
+        self.worker.cancel()
+        documents = self.workspace.documents
+        index = documents.index(self.document)
+        name = self.document.name
+        self.workspace.close(self.document)
+        self.document = None
+        if documents:
+            self.switch_document(documents[min(index, len(documents) - 1)])
+        else:
+            self._clear_document_view()
+            self.update_status(f"✖ Dokumen ditutup: {name}")
+    
+    def _clear_document_view(self):
+        """Forget the main image and its result, leaving the second image alone"""
+        self.original_image = None
+        self._invalidate_derived()
+        self.pipeline.reset()
+        self.pipeline.set_source(None)
+        self._refresh_pipeline_view()
+        self._reset_history()
+        self.processed_image = None
+        self.current_image_path = None
+        self._refresh_document_selector()
+        
+        self.original_panel.config(image='', text="Klik 'Buka Gambar Utama' untuk memulai")
+        self.original_panel.image = None
+        self.processed_panel.config(image='', text="Hasil pemrosesan akan muncul di sini")
+        self.processed_panel.image = None
+        for panel in (self.original_panel, self.processed_panel):
+            self._forget_preview(panel)
     
     def load_second_image(self):
         """Load second image for logic operations"""
@@ -518,18 +1807,12 @@ class ImageProcessorApp:
         try:
             second_img = self._load_image_with_pil_fallback(path)
             
-            # Resize to match original image
-            h, w = self.original_image.shape[:2]
-            second_img = cv2.resize(second_img, (w, h), interpolation=cv2.INTER_AREA)
-            
-            # Match color channels
-            if len(self.original_image.shape) == 3 and len(second_img.shape) == 2:
-                second_img = cv2.cvtColor(second_img, cv2.COLOR_GRAY2BGR)
-            elif len(self.original_image.shape) == 2 and len(second_img.shape) == 3:
-                second_img = cv2.cvtColor(second_img, cv2.COLOR_BGR2GRAY)
-            
-            self.second_image = second_img
+            # Kept at native resolution; operations get a resized, channel-matched
+            # variant for their input geometry, computed once and cached
+            self.second_image = engine.MatchedImage(second_img)
             self.second_image_path = path
+            self.pipeline.set_source(self.original_image, self.second_image)
+            self.history.second_changed()
             self.display_image(second_img, self.second_panel)
             
             self.update_status(f"✅ Gambar kedua dimuat: {os.path.basename(path)}")
@@ -543,80 +1826,202 @@ class ImageProcessorApp:
             messagebox.showerror("❌ Error", f"Terjadi kesalahan saat memuat gambar kedua:\n{str(e)}", parent=self.root)
             self.update_status("❌ Gagal memuat gambar kedua")
     
-    def display_image(self, image_cv, panel, zoom=None):
-        """Display image in panel while maintaining aspect ratio"""
+    def _get_preview_pyramid(self, image_cv, panel, pyramid=None):
+        """Return the preview pyramid of the image shown in panel
+        
+        The pyramid is built once per image (or passed in when it was already
+        built on the worker thread) and reused for every later redraw.
+        """
+        cached = self._pyramids.get(panel)
+        if cached is not None and cached[0] is image_cv:
+            return cached
+        if pyramid is None or pyramid[0] is not image_cv:
+            pyramid = engine.build_preview_pyramid(image_cv)
+        self._pyramids[panel] = pyramid
+        self._display_state.pop(panel, None)
+        self._update_histogram(panel, image_cv)
+        return pyramid
+    
+    def _forget_preview(self, panel):
+        """Release the preview pyramid of a panel that no longer shows an image"""
+        self._pyramids.pop(panel, None)
+        self._display_state.pop(panel, None)
+        self._viewports.pop(panel, None)
+        self._update_histogram(panel, None)
+    
+    def _update_histogram(self, panel, image_cv):
+        """Let the histogram panel follow the image shown in panel"""
+        if panel is self.original_panel:
+            self.histogram.set_image('original', image_cv)
+        elif panel is self.processed_panel:
+            self.histogram.set_image('processed', image_cv)
+    
+    def _preview_proxy(self):
+        """Pyramid level of original_image just large enough for the result panel"""
+        pyramid = self._get_preview_pyramid(self.original_image, self.original_panel)
+        return engine.select_pyramid_level(
+            pyramid,
+            max(1, self.processed_panel.winfo_width()),
+            max(1, self.processed_panel.winfo_height())
+        )
+    
+    def _step_preview_input(self):
+        """Proxy of the image a new operation will be applied to
+        
+        In chain mode a committed step runs on the chain's output, so the
+        chain is replayed on the proxy once, here, rather than per slider move.
+        """
+        proxy = self._preview_proxy()
+        if self.chain_mode.get() and len(self.pipeline):
+            return engine.apply_operations(proxy, self.pipeline.step_specs(), second=self.second_image)
+        return proxy
+    
+    def show_preview(self, image):
+        """Show a proxy-sized live preview in the result panel"""
+        if self._stashed_pyramid is None:
+            # Keep the result's pyramid so cancelling does not rebuild it
+            self._stashed_pyramid = self._pyramids.get(self.processed_panel, [])
+        # The proxy is already panel-sized, so it is its own single-level pyramid
+        self._get_preview_pyramid(image, self.processed_panel, [image])
+        self.display_image(image, self.processed_panel)
+    
+    def restore_processed_view(self):
+        """Show processed_image again after a cancelled live preview"""
+        stashed, self._stashed_pyramid = self._stashed_pyramid, None
+        if self.processed_image is not None:
+            self._get_preview_pyramid(self.processed_image, self.processed_panel, stashed or None)
+            self._display_processed()
+        else:
+            self.processed_panel.config(image='', text="Hasil pemrosesan akan muncul di sini")
+            self.processed_panel.image = None
+            self._forget_preview(self.processed_panel)
+    
+    def display_image(self, image_cv, panel, zoom=None, center=None):
+        """Display image in panel while maintaining aspect ratio
+        
+        zoom is relative to fit-to-panel and center is the full-resolution
+        pixel shown in the middle of the panel (None = image centre).
+        """
         if image_cv is None:
             panel.config(image='', text="Tidak ada gambar")
             panel.image = None
             return
         
         try:
-            # Dapatkan ukuran asli gambar
-            original_height, original_width = image_cv.shape[:2]
-            aspect_ratio = original_width / original_height
-            
             # Dapatkan ukuran panel yang tersedia
-            panel_width = panel.winfo_width()
-            panel_height = panel.winfo_height()
-            
-            # Hitung ukuran baru yang mempertahankan aspect ratio
-            if panel_width / aspect_ratio < panel_height:
-                new_width = panel_width
-                new_height = int(panel_width / aspect_ratio)
-            else:
-                new_height = panel_height
-                new_width = int(panel_height * aspect_ratio)
+            panel_width = max(1, panel.winfo_width())
+            panel_height = max(1, panel.winfo_height())
+            zoom = 1.0 if zoom is None else zoom
             
-            # Pastikan ukuran minimal 1 pixel
-            new_width = max(1, new_width)
-            new_height = max(1, new_height)
-            
-            # Resize gambar dengan interpolasi yang baik
-            resized_image = cv2.resize(image_cv, (new_width, new_height), 
-                                    interpolation=cv2.INTER_AREA)
+            # Skip the redraw when nothing visible changed (e.g. window moved)
+            pyramid = self._get_preview_pyramid(image_cv, panel)
+            state = (panel_width, panel_height, zoom, center)
+            if self._display_state.get(panel) == state and panel.image is not None:
+                return
             
-            # Konversi ke format yang bisa ditampilkan di Tkinter
-            if len(resized_image.shape) == 2:  # Grayscale
-                image_rgb = cv2.cvtColor(resized_image, cv2.COLOR_GRAY2RGB)
-            else:  # Color (BGR)
-                image_rgb = cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB)
+            # Potong area yang terlihat dari level pyramid terdekat, resize, konversi ke RGB
+            image_pil, viewport = engine.render_display(pyramid, panel_width, panel_height, zoom, center)
             
             # Konversi ke PhotoImage
-            image_pil = Image.fromarray(image_rgb)
-            photo = ImageTk.PhotoImage(image_pil)
+            with trace.span('photoimage'):
+                photo = ImageTk.PhotoImage(image_pil)
             
             # Update panel
             panel.image = photo
             panel.config(image=photo, text="")
+            self._display_state[panel] = state
+            self._viewports[panel] = viewport
             
         except Exception as e:
             panel.config(image='', text=f"Error menampilkan gambar:\n{str(e)}")
             panel.image = None
             self.update_status(f"❌ Gagal menampilkan gambar: {str(e)}")
 
+    def _display_processed(self):
+        """Show processed_image with the current zoom and pan"""
+        self.display_image(self.processed_image, self.processed_panel,
+                           zoom=self.zoom_level, center=self.view_center)
+    
+    def _schedule_view_redraw(self):
+        """Coalesce zoom/pan events into at most one redraw per frame"""
+        if self._view_redraw is None:
+            self._view_redraw = self.root.after(16, self._redraw_view)
+    
+    def _redraw_view(self):
+        self._view_redraw = None
+        if self.processed_image is not None:
+            self._display_processed()
+    
+    def _panel_to_image(self, x, y):
+        """Map a point in the processed panel to full-resolution coordinates"""
+        viewport = self._viewports[self.processed_panel]
+        view = self.processed_panel.image
+        # Label menampilkan gambar di tengah panel
+        off_x = (self.processed_panel.winfo_width() - view.width()) / 2
+        off_y = (self.processed_panel.winfo_height() - view.height()) / 2
+        return (viewport['x0'] + (x - off_x) / viewport['scale'],
+                viewport['y0'] + (y - off_y) / viewport['scale'])
+    
     def zoom_image(self, event):
-        """Handle zoom in/out for processed image"""
-        if self.processed_image is None:
+        """Handle zoom in/out for processed image, anchored at the mouse pointer"""
+        if self.processed_image is None or self.processed_panel not in self._viewports:
             return
         
+        viewport = self._viewports[self.processed_panel]
+        fit_scale = viewport['scale'] / self.zoom_level
+        max_zoom = max(1.0, self.MAX_PIXEL_SCALE / fit_scale)
+        anchor_x, anchor_y = self._panel_to_image(event.x, event.y)
+        
         # Determine zoom direction
         if event.num == 5 or (hasattr(event, 'delta') and event.delta < 0):  # Zoom out
             self.zoom_level = max(0.1, self.zoom_level * 0.9)
         else:  # Zoom in
-            self.zoom_level = min(3.0, self.zoom_level * 1.1)
+            self.zoom_level = min(max_zoom, self.zoom_level * 1.1)
+        
+        # Keep the pixel under the pointer in place
+        scale = fit_scale * self.zoom_level
+        self.view_center = (
+            anchor_x + (self.processed_panel.winfo_width() / 2 - event.x) / scale,
+            anchor_y + (self.processed_panel.winfo_height() / 2 - event.y) / scale
+        )
         
         # Apply zoom
-        self.display_image(self.processed_image, self.processed_panel, zoom=self.zoom_level)
-        self.update_status(f"🔍 Zoom level: {self.zoom_level:.1f}x")
+        self._schedule_view_redraw()
+        self.update_status(f"🔍 Zoom level: {self.zoom_level:.1f}x ({scale * 100:.0f}% piksel asli)")
+    
+    def start_pan(self, event):
+        """Start dragging the processed image"""
+        viewport = self._viewports.get(self.processed_panel)
+        if self.processed_image is None or viewport is None:
+            return
+        self._pan_start = (event.x, event.y, viewport['center'], viewport['scale'])
+        self.processed_panel.config(cursor='fleur')
+    
+    def pan_image(self, event):
+        """Move the viewport while dragging"""
+        if self._pan_start is None:
+            return
+        start_x, start_y, (cx, cy), scale = self._pan_start
+        self.view_center = (cx - (event.x - start_x) / scale,
+                            cy - (event.y - start_y) / scale)
+        self._schedule_view_redraw()
+    
+    def end_pan(self, event):
+        self._pan_start = None
+        self.processed_panel.config(cursor='')
+        # Store the clamped centre so the next drag starts from what is shown
+        viewport = self._viewports.get(self.processed_panel)
+        if viewport is not None and self.view_center is not None:
+            self.view_center = viewport['center']
     
     def _update_displayed_images(self):
         """Update all displayed images"""
-        if self.original_image is not None:
+        if self.original_image is not None and not self._loading:
             self.display_image(self.original_image, self.original_panel)
         if self.second_image is not None:
-            self.display_image(self.second_image, self.second_panel)
+            self.display_image(self.second_image.image, self.second_panel)
         if self.processed_image is not None:
-            self.display_image(self.processed_image, self.processed_panel)
+            self._display_processed()
     
     def reset_image(self):
         """Reset all images to original state"""
@@ -629,24 +2034,19 @@ class ImageProcessorApp:
             return
         
         try:
-            # Clear all images
-            self.original_image = None
-            self.processed_image = None
+            self.worker.cancel()
+            
+            # Close every open document and clear all images
+            for document in list(self.workspace.documents):
+                self.workspace.close(document)
+            self.document = None
+            self._clear_document_view()
             self.second_image = None
             self.second_image_path = None
             
-            # Reset current image path
-            self.current_image_path = None
-            
-            # Clear all panels
-            self.original_panel.config(image='', text="Klik 'Buka Gambar Utama' untuk memulai")
-            self.original_panel.image = None
-            
-            self.processed_panel.config(image='', text="Hasil pemrosesan akan muncul di sini")
-            self.processed_panel.image = None
-            
             self.second_panel.config(image='', text="Klik 'Buka Gambar Kedua' untuk operasi logika")
             self.second_panel.image = None
+            self._forget_preview(self.second_panel)
             
             self.update_status("🔄 Semua gambar telah direset")
             messagebox.showinfo(
@@ -672,6 +2072,7 @@ class ImageProcessorApp:
         file_types = [
             ("PNG files", "*.png"),
             ("JPEG files", "*.jpg"),
+            ("WebP files", "*.webp"),
             ("BMP files", "*.bmp"),
             ("TIFF files", "*.tiff"),
             ("All files", ".")
@@ -685,24 +2086,117 @@ class ImageProcessorApp:
         if not path:
             return
         
+        if self.export_options is None:
+            self.export_options = {
+                'quality': engine.DEFAULT_QUALITY,
+                'compression': engine.DEFAULT_PNG_COMPRESSION,
+                'png': False,
+                'jpg': False,
+                'webp': False,
+                'max_side': 0,
+            }
+        options = self.export_options
+        OptionsDialog(
+            self,
+            "💾 Opsi Simpan",
+            [
+                ('quality', "Kualitas JPEG/WebP (1-100)", ('int', 1, 100, options['quality'])),
+                ('compression', "Kompresi PNG (0-9)", ('int', 0, 9, options['compression'])),
+                ('png', "Juga simpan .png", ('flag', options['png'])),
+                ('jpg', "Juga simpan .jpg", ('flag', options['jpg'])),
+                ('webp', "Juga simpan .webp", ('flag', options['webp'])),
+                ('max_side', "Juga versi kecil, sisi terpanjang (px)", ('int', 0, 16384, options['max_side'])),
+            ],
+            lambda values: self._export_processed(path, values),
+            note="Versi kecil 0 = tidak dibuat. Penyimpanan berjalan di latar belakang."
+        )
+    
+    def _export_processed(self, path, options):
+        """Encode processed_image to path (and extra formats/sizes) off the Tk thread"""
+        self.export_options = options
+        formats = [ext for ext in ('png', 'jpg', 'webp') if options[ext]]
+        targets = engine.export_targets(path, formats, [options['max_side']])
+        # Results are never modified in place, so the encoder reads the array directly
+        image = self.processed_image
+        
+        def export():
+            start = time.perf_counter()
+            results = engine.export_image(image, targets, options['quality'], options['compression'])
+            return results, time.perf_counter() - start
+        
+        if self._exporter is None:
+            self._exporter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="citra-export")
+        future = self._exporter.submit(export)
+        self.update_status(f"💾 Menyimpan {os.path.basename(path)} di latar belakang...")
+        self._poll_export(future)
+    
+    def _poll_export(self, future):
+        if not future.done():
+            self.root.after(BackgroundWorker.POLL_MS, self._poll_export, future)
+            return
         try:
-            save_img = self.processed_image.copy()
-            
-            # Convert grayscale to BGR for certain formats
-            if len(save_img.shape) == 2 and path.lower().endswith(('.jpg', '.jpeg', '.webp')):
-                save_img = cv2.cvtColor(save_img, cv2.COLOR_GRAY2BGR)
-            
-            cv2.imwrite(path, save_img)
-            self.update_status(f"💾 Gambar disimpan: {os.path.basename(path)}")
-            messagebox.showinfo(
-                "✅ Sukses", 
-                f"Gambar berhasil disimpan di:\n{path}",
-                parent=self.root
-            )
-            
+            results, elapsed = future.result()
         except Exception as e:
             messagebox.showerror("❌ Error", f"Terjadi kesalahan saat menyimpan:\n{str(e)}", parent=self.root)
             self.update_status("❌ Gagal menyimpan gambar")
+            return
+        self.update_status(f"💾 {engine.format_export_report(results, elapsed)}")
+    
+    def process_video(self):
+        """Run the current operation chain on every frame of a video file"""
+        steps = self.pipeline.step_specs()
+        if not steps:
+            messagebox.showwarning(
+                "⚠ Peringatan",
+                "Rantai operasi masih kosong.\nJalankan operasi pada gambar atau muat resep terlebih dahulu.",
+                parent=self.root
+            )
+            return
+        if any(step.needs_second for step in self.pipeline.steps) and self.second_image is None:
+            messagebox.showerror("❌ Error", "Operasi AND pada video memerlukan gambar kedua sebagai mask.",
+                                 parent=self.root)
+            return
+        
+        import citra_video
+        path = filedialog.askopenfilename(
+            title="Pilih Video",
+            filetypes=[("Video Files", " ".join("*" + ext for ext in citra_video.VIDEO_EXTENSIONS)),
+                       ("All files", ".")],
+            parent=self.root
+        )
+        if not path:
+            return
+        if self._video_worker is not None and self._video_worker.is_busy() and not messagebox.askyesno(
+                "Video", "Video lain masih diproses. Hentikan dan proses video ini?", parent=self.root):
+            return
+        output_path = filedialog.asksaveasfilename(
+            title="Simpan Video Hasil",
+            defaultextension=".mp4",
+            filetypes=[("MP4 files", "*.mp4"), ("AVI files", "*.avi")],
+            parent=self.root
+        )
+        if not output_path:
+            return
+        
+        second = self.second_image
+        
+        def on_done(outcome):
+            frames, elapsed = outcome
+            self.update_status(f"🎞 {citra_video.format_rate(frames, elapsed)}: {os.path.basename(output_path)}")
+        
+        def on_error(e):
+            messagebox.showerror("❌ Error", f"Gagal memproses video:\n{str(e)}", parent=self.root)
+            self.update_status("❌ Gagal memproses video")
+        
+        if self._video_worker is None:
+            self._video_worker = BackgroundWorker(self.root, self.show_progress)
+        self._video_worker.submit(
+            f"Memproses video {os.path.basename(path)}",
+            lambda cancel: citra_video.process_video(path, steps, output_path, second=second,
+                                                     cancel_event=cancel),
+            on_done,
+            on_error
+        )
     
     # === IMAGE PROCESSING METHODS ===
     
@@ -711,174 +2205,121 @@ class ImageProcessorApp:
         if not self._check_image_loaded():
             return
         
-        try:
-            if len(self.original_image.shape) == 3:
-                gray_image = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray_image = self.original_image.copy()
-            
-            self.processed_image = gray_image
-            self.display_image(gray_image, self.processed_panel)
-            self.update_status("✅ Konversi ke grayscale selesai")
-            self.zoom_level = 1.0  # Reset zoom
-            
-        except Exception as e:
-            messagebox.showerror("❌ Error", f"Gagal mengkonversi ke grayscale:\n{str(e)}", parent=self.root)
-            self.update_status("❌ Gagal mengkonversi ke grayscale")
+        image, source = self.original_image, self.image_generation
+        cache = self.derived_cache
+        self._run_operation(
+            "Konversi grayscale",
+            lambda cancel: cache.grayscale(source, image),
+            "✅ Konversi ke grayscale selesai",
+            "Gagal mengkonversi ke grayscale",
+            step=('grayscale', {})
+        )
     
     def convert_to_binary(self):
-        """Convert image to binary"""
+        """Convert image to binary, choosing the threshold with a live preview"""
         if not self._check_image_loaded():
             return
         
-        try:
-            threshold_str = simpledialog.askstring(
-                "Input Threshold", 
-                "Masukkan nilai threshold (0-255):",
-                initialvalue="127",
-                parent=self.root
-            )
-            
-            if threshold_str is None:
-                return
-            
-            try:
-                threshold = int(threshold_str)
-                threshold = max(0, min(255, threshold))
-            except ValueError:
-                threshold = 127
-                messagebox.showwarning(
-                    "⚠ Input", 
-                    "Nilai tidak valid, menggunakan threshold default (127)",
-                    parent=self.root
-                )
-            
-            # Convert to grayscale first if needed
-            if len(self.original_image.shape) == 3:
-                gray_image = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray_image = self.original_image.copy()
-            
-            # Apply threshold
-            _, binary_image = cv2.threshold(gray_image, threshold, 255, cv2.THRESH_BINARY)
-            
-            self.processed_image = binary_image
-            self.display_image(binary_image, self.processed_panel)
-            self.update_status(f"✅ Konversi ke biner selesai (threshold: {threshold})")
-            self.zoom_level = 1.0  # Reset zoom
-            
-        except Exception as e:
-            messagebox.showerror("❌ Error", f"Gagal mengkonversi ke biner:\n{str(e)}", parent=self.root)
-            self.update_status("❌ Gagal mengkonversi ke biner")
+        # Threshold preview only needs the grayscale plane of the proxy
+        proxy_gray = engine.convert_to_grayscale(self._step_preview_input())
+        LivePreviewDialog(
+            self,
+            "Input Threshold",
+            "Nilai threshold (0-255):",
+            initial=127,
+            preview=lambda threshold: engine.convert_to_binary(proxy_gray, threshold),
+            on_commit=self._apply_binary
+        )
+    
+    def _apply_binary(self, threshold):
+        """Compute the full-resolution binary image for a committed threshold"""
+        image, source = self.original_image, self.image_generation
+        cache = self.derived_cache
+        self._run_operation(
+            "Konversi biner",
+            lambda cancel: cache.binary(source, image, threshold),
+            f"✅ Konversi ke biner selesai (threshold: {threshold})",
+            "Gagal mengkonversi ke biner",
+            step=('binary', {'threshold': threshold})
+        )
     
     def arithmetic_addition(self):
-        """Add brightness to image"""
+        """Add brightness to image, choosing the value with a live preview"""
         if not self._check_image_loaded():
             return
         
-        try:
-            value_str = simpledialog.askstring(
-                "Input Kecerahan", 
-                "Masukkan nilai penambah kecerahan (0-255):",
-                initialvalue="50",
-                parent=self.root
-            )
-            
-            if value_str is None:
-                return
-            
-            try:
-                value = int(value_str)
-                value = max(0, min(255, value))
-            except ValueError:
-                value = 50
-                messagebox.showwarning(
-                    "⚠ Input", 
-                    "Nilai tidak valid, menggunakan nilai default (50)",
-                    parent=self.root
-                )
-            
-            # Create matrix with brightness value
-            M = np.ones(self.original_image.shape, dtype="uint8") * value
-            added_image = cv2.add(self.original_image, M)
-            
-            self.processed_image = added_image
-            self.display_image(added_image, self.processed_panel)
-            self.update_status(f"✅ Kecerahan ditambah: +{value}")
-            self.zoom_level = 1.0  # Reset zoom
-            
-        except Exception as e:
-            messagebox.showerror("❌ Error", f"Gagal menambah kecerahan:\n{str(e)}", parent=self.root)
-            self.update_status("❌ Gagal menambah kecerahan")
+        proxy = self._step_preview_input()
+        LivePreviewDialog(
+            self,
+            "Input Kecerahan",
+            "Nilai penambah kecerahan (0-255):",
+            initial=50,
+            preview=lambda value: engine.arithmetic_addition(proxy, value),
+            on_commit=self._apply_brightness
+        )
+    
+    def _apply_brightness(self, value):
+        """Compute the full-resolution brightness result for a committed value"""
+        image = self.original_image
+        self._run_operation(
+            "Penambahan kecerahan",
+            lambda cancel: engine.arithmetic_addition(image, value),
+            f"✅ Kecerahan ditambah: +{value}",
+            "Gagal menambah kecerahan",
+            step=('brightness', {'value': value})
+        )
     
     def morphological_erosion(self):
         """Apply morphological erosion"""
         if not self._check_image_loaded():
             return
         
-        try:
-            # Convert to grayscale if needed
-            if len(self.original_image.shape) == 3:
-                img = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2GRAY)
-            else:
-                img = self.original_image.copy()
-            
-            # Define structuring elements
-            se1 = np.array([[1, 1, 1],
-                           [1, 1, 1],
-                           [1, 1, 1]], dtype=np.uint8)  # Square 3x3
-            se2 = np.array([[0, 1, 0],
-                           [1, 1, 1],
-                           [0, 1, 0]], dtype=np.uint8)  # Cross 3x3
-            
-            # Apply erosion
-            eroded_image1 = cv2.erode(img, se1)
-            eroded_image2 = cv2.erode(img, se2)
-            eroded_image = cv2.bitwise_or(eroded_image1, eroded_image2)
-            
-            # Convert back to BGR if original was color
-            if len(self.original_image.shape) == 3:
-                eroded_image = cv2.cvtColor(eroded_image, cv2.COLOR_GRAY2BGR)
-            
-            self.processed_image = eroded_image
-            self.display_image(self.processed_image, self.processed_panel)
-            self.update_status("✅ Operasi erosi selesai")
-            self.zoom_level = 1.0  # Reset zoom
-            
-        except Exception as e:
-            messagebox.showerror("❌ Error", f"Gagal melakukan operasi erosi:\n{str(e)}", parent=self.root)
-            self.update_status("❌ Gagal melakukan operasi erosi")
+        image, source = self.original_image, self.image_generation
+        cache = self.derived_cache
+        self._run_operation(
+            "Operasi erosi",
+            lambda cancel: engine.morphological_erosion(image, gray=cache.grayscale(source, image)),
+            "✅ Operasi erosi selesai",
+            "Gagal melakukan operasi erosi",
+            step=('erode', {})
+        )
     
-    def show_histogram(self):
-        """Show histogram of the original image"""
+    MORPH_OPERATIONS = (('erode', "Erosi"), ('dilate', "Dilasi"), ('open', "Opening"),
+                        ('close', "Closing"), ('gradient', "Gradient"))
+    MORPH_ELEMENTS = (('rect', "Persegi"), ('cross', "Silang"), ('ellipse', "Elips"),
+                      ('hline', "Garis horizontal"), ('vline', "Garis vertikal"), ('diagonal', "Diagonal"))
+    
+    def morphology(self):
+        """Erosion, dilation, opening, closing or gradient with a chosen element"""
         if not self._check_image_loaded():
             return
-        
+        OptionsDialog(self, "Morfologi", [
+            ('op', "Operasi:", ('choice', self.MORPH_OPERATIONS)),
+            ('element', "Elemen struktur:", ('choice', self.MORPH_ELEMENTS)),
+            ('size', "Ukuran (piksel):", ('int', 1, morph.MAX_SIZE, 3)),
+            ('iterations', "Iterasi:", ('int', 1, 100, 1)),
+        ], self._apply_morphology)
+    
+    def _apply_morphology(self, params):
+        image = self.original_image
+        label = f"{params['op']} {params['element']} {params['size']}x{params['size']}"
+        if params['iterations'] > 1:
+            label += f" ×{params['iterations']}"
+        self._run_operation(
+            f"Morfologi {label}",
+            lambda cancel: engine.morphology_operation(image, **params),
+            f"✅ Morfologi selesai ({label})",
+            "Gagal melakukan operasi morfologi",
+            step=('morph', params)
+        )
+    
+    def show_histogram(self):
+        """Show or hide the histogram panel of the input and processed image"""
         try:
-            plt.figure(figsize=(8, 4))
-            colors = ('b', 'g', 'r')
-            
-            # Handle grayscale or color images
-            if len(self.original_image.shape) == 2:
-                hist = cv2.calcHist([self.original_image], [0], None, [256], [0, 256])
-                plt.plot(hist, color='gray')
+            if self.histogram.toggle():
+                self.update_status("📊 Histogram ditampilkan")
             else:
-                for i, color in enumerate(colors):
-                    hist = cv2.calcHist([self.original_image], [i], None, [256], [0, 256])
-                    plt.plot(hist, color=color)
-            
-            plt.title('Histogram Gambar', fontsize=12)
-            plt.xlabel('Intensitas Pixel', fontsize=10)
-            plt.ylabel('Jumlah Pixel', fontsize=10)
-            plt.xlim([0, 256])
-            
-            if len(self.original_image.shape) == 3:
-                plt.legend(['B', 'G', 'R'])
-            
-            plt.grid(True, alpha=0.3)
-            plt.show()
-            self.update_status("📊 Histogram ditampilkan")
-            
+                self.update_status("📊 Histogram disembunyikan")
         except Exception as e:
             messagebox.showerror("❌ Error", f"Gagal menampilkan histogram:\n{str(e)}", parent=self.root)
             self.update_status("❌ Gagal menampilkan histogram")
@@ -888,50 +2329,199 @@ class ImageProcessorApp:
         if not self._check_image_loaded():
             return
         
-        try:
-            # Convert to grayscale
-            if len(self.original_image.shape) == 3:
-                gray = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = self.original_image.copy()
-            
-            # Apply Canny
-            edges = cv2.Canny(gray, 100, 200)
-            
-            # Convert back to BGR for display consistency
-            edges_bgr = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-            
-            self.processed_image = edges_bgr
-            self.display_image(edges_bgr, self.processed_panel)
-            self.update_status("✅ Deteksi tepi (Canny) selesai")
-            self.zoom_level = 1.0  # Reset zoom
-            
-        except Exception as e:
-            messagebox.showerror("❌ Error", f"Gagal melakukan deteksi tepi:\n{str(e)}", parent=self.root)
-            self.update_status("❌ Gagal melakukan deteksi tepi")
+        image, source = self.original_image, self.image_generation
+        cache = self.derived_cache
+        self._run_operation(
+            "Deteksi tepi",
+            lambda cancel: engine.edge_detection(cache.grayscale(source, image), low=100, high=200),
+            "✅ Deteksi tepi (Canny) selesai",
+            "Gagal melakukan deteksi tepi",
+            step=('edge', {})
+        )
     
     def logic_and_operation(self):
         """Apply AND operation on two images"""
         if not self._check_two_images_loaded():
             return
         
-        try:
-            and_result = cv2.bitwise_and(self.original_image, self.second_image)
-            self.processed_image = and_result
-            self.display_image(and_result, self.processed_panel)
-            self.update_status("✅ Operasi AND selesai")
-            self.zoom_level = 1.0  # Reset zoom
-            
-        except Exception as e:
-            messagebox.showerror("❌ Error", f"Gagal melakukan operasi AND:\n{str(e)}", parent=self.root)
-            self.update_status("❌ Gagal melakukan operasi AND")
+        image, second = self.original_image, self.second_image
+        self._run_operation(
+            "Operasi AND",
+            lambda cancel: engine.logic_and_operation(image, second.matched(image)),
+            "✅ Operasi AND selesai",
+            "Gagal melakukan operasi AND",
+            step=('and', {})
+        )
+    
+    LOGIC_OPERATIONS = (('and', "AND"), ('or', "OR"), ('xor', "XOR"))
+    
+    def logic_multiple_images(self):
+        """AND/OR/XOR of the main image with any number of image files"""
+        if not self._check_image_loaded():
+            return
+        
+        file_types = [
+            ("Image Files", "*.jpg *.jpeg *.png *.bmp *.gif *.tiff *.tif *.webp *.heic"),
+            ("All files", ".")
+        ]
+        paths = filedialog.askopenfilenames(
+            title="Pilih Gambar yang Akan Digabung",
+            filetypes=file_types,
+            parent=self.root
+        )
+        if not paths:
+            return
+        OptionsDialog(self, "Operasi Logika", [
+            ('op', "Operasi:", ('choice', self.LOGIC_OPERATIONS)),
+            ('invert', "NOT pada hasil:", ('flag', False)),
+        ], lambda params: self._apply_logic_multiple(list(paths), params),
+            note=f"{len(paths)} gambar dipilih, digabung dengan gambar utama.\n"
+                 "Gambar dengan ukuran berbeda disesuaikan dengan gambar utama.")
+    
+    def _apply_logic_multiple(self, paths, params):
+        image = self.original_image
+        params = dict(params, paths=paths)
+        label = f"{params['op'].upper()} {len(paths) + 1} gambar"
+        if params['invert']:
+            label = f"NOT({label})"
+        self._run_operation(
+            f"Operasi {label}",
+            lambda cancel: engine.combine_masks(image, **params),
+            f"✅ Operasi {label} selesai",
+            "Gagal melakukan operasi logika",
+            step=('masks', params)
+        )
     
     def on_closing(self):
         """Handle window closing"""
         if messagebox.askokcancel("Keluar", "Apakah Anda yakin ingin keluar?", parent=self.root):
+            self.worker.shutdown()
+            if self._video_worker is not None:
+                self._video_worker.shutdown()
+            if self._history is not None:
+                self._history.shutdown()
+            if self._workspace is not None:
+                self._workspace.shutdown()
+            if self._exporter is not None:
+                self._exporter.shutdown(wait=True)  # Let pending exports finish writing
+            if self.strip_executor is not None:
+                self.strip_executor.shutdown()
+            if self.folder_browser is not None:
+                self.folder_browser.close()
+            if self.trace_path and trace.is_enabled():
+                try:
+                    trace.export(self.trace_path)
+                except OSError as e:
+                    messagebox.showerror("❌ Error", f"Gagal menyimpan trace:\n{str(e)}", parent=self.root)
             self.root.destroy()
 
-if __name__ == "__main__":
+def main(argv=None):
+    """Start the GUI, or run a headless batch/video job when --batch or --video is given"""
+    parser = argparse.ArgumentParser(description="F.A.I.T Vision - Pengolahan Citra Digital")
+    parser.add_argument("--batch", metavar="GLOB",
+                        help="pola file input, mis. 'scans/**/*.png' (tanpa GUI)")
+    parser.add_argument("--video", metavar="PATH",
+                        help="proses setiap frame file video dengan --op/--recipe (tanpa GUI); "
+                             "--output berupa file .mp4/.avi atau direktori")
+    parser.add_argument("--op", action="append", default=[], metavar="NAME[:k=v,...]",
+                        help="operasi berurutan, mis. --op grayscale --op binary:threshold=100 "
+                             "--op dilate:kernel=horizontal (pilihan: grayscale, binary, brightness, gamma, "
+                             "contrast, invert, edge, dilate, erode, morph, and, or, xor, masks; "
+                             "mis. morph:op=close,element=ellipse,size=7 atau masks:op=or,paths=a.png;b.png)")
+    parser.add_argument("--recipe", metavar="JSON",
+                        help="resep rantai operasi yang disimpan dari GUI (dijalankan sebelum --op)")
+    parser.add_argument("--output", "-o", default="output", help="direktori output batch")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses worker")
+    parser.add_argument("--threads", type=int, default=None, metavar="N",
+                        help="proses setiap gambar/frame sebagai N strip horizontal secara paralel "
+                             "(GUI, --video, dan per worker pada --batch)")
+    parser.add_argument("--cv-threads", type=int, default=None, metavar="N",
+                        help="jumlah thread internal OpenCV (default: 1 bila --threads > 1 atau pada "
+                             "--batch, selain itu bawaan OpenCV)")
+    parser.add_argument("--second", metavar="PATH",
+                        help="gambar kedua untuk operasi 'and', 'or' dan 'xor' (mask statis untuk setiap frame pada --video)")
+    parser.add_argument("--format", metavar="EXT", help="ekstensi output, mis. png (default: sama dengan input)")
+    parser.add_argument("--quality", type=int, default=None, metavar="1-100",
+                        help="kualitas output JPEG/WebP pada --batch (default encoder: 95)")
+    parser.add_argument("--png-compression", type=int, default=None, metavar="0-9",
+                        help="tingkat kompresi output PNG pada --batch; 0 tercepat, 9 terkecil (default encoder: 1)")
+    parser.add_argument("--history-mb", type=int, default=None,
+                        help="batas memori checkpoint undo/redo terkompresi (MB, default 64)")
+    parser.add_argument("--tile", type=int, metavar="PX",
+                        help="proses per tile PX x PX untuk gambar sangat besar (input/output .npy atau .tif)")
+    parser.add_argument("--cache-mb", type=int, default=None,
+                        help="batas memori cache grayscale/biner di GUI (MB, default 256)")
+    parser.add_argument("--workspace-mb", type=int, default=None,
+                        help="batas RAM untuk semua dokumen yang terbuka di GUI; sisanya disimpan "
+                             "sementara ke disk (MB, default 1024)")
+    parser.add_argument("--trace", metavar="JSON",
+                        help="rekam waktu dan alokasi setiap tahap, simpan sebagai Chrome trace "
+                             "(saat keluar dari GUI atau di akhir batch/video)")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="ukur waktu import dan waktu sampai jendela pertama tampil, lalu keluar")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS, metavar="MS",
+                        help=f"batas waktu startup untuk --startup-profile (default {STARTUP_BUDGET_MS} ms)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        trace.enable()
+
+    if args.batch:
+        import citra_batch
+        return citra_batch.main(args)
+    if args.video:
+        import citra_video
+        return citra_video.main(args)
+
+    strip_executor = None
+    if args.threads or args.cv_threads:
+        import citra_parallel
+        try:
+            strip_executor = citra_parallel.configure(args.threads, args.cv_threads)
+        except ValueError as e:
+            parser.error(str(e))
+    
     root = tk.Tk()
-    app = ImageProcessorApp(root)
-    root.mainloop()
\ No newline at end of file
+    app = ImageProcessorApp(root,
+                            cache_bytes=args.cache_mb * 1024 * 1024 if args.cache_mb else None,
+                            history_bytes=args.history_mb * 1024 * 1024 if args.history_mb else None,
+                            trace_path=args.trace,
+                            workspace_bytes=args.workspace_mb * 1024 * 1024 if args.workspace_mb else None,
+                            strip_executor=strip_executor)
+    if args.startup_profile:
+        return profile_startup(root, args.startup_budget)
+    root.mainloop()
+    return 0
+
+def profile_startup(root, budget_ms):
+    """Report import time and time to first window, exit non-zero over budget"""
+    report = {}
+    
+    def on_first_window():
+        if 'window' in report:
+            return
+        # Measured once the window is mapped and its first frame drawn
+        report['window'] = (time.perf_counter() - _START_TIME) * 1000
+        root.after_idle(root.quit)
+    
+    root.bind("<Map>", lambda e: e.widget is root and root.after_idle(on_first_window), add="+")
+    root.after(int(budget_ms * 10), root.quit)  # Safety net when no window manager maps us
+    root.mainloop()
+    
+    window_ms = report.get('window')
+    # A module registered by _lazy_import only becomes a plain module once loaded;
+    # type() is used because isinstance() would itself trigger the load
+    loaded = [name for name in HEAVY_MODULES
+              if name in sys.modules and type(sys.modules[name]) is types.ModuleType]
+    print(f"Import modul: {_IMPORT_TIME * 1000:.1f} ms")
+    if window_ms is None:
+        print("Jendela pertama: tidak tampil (tidak ada window manager?)")
+    else:
+        print(f"Jendela pertama: {window_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"Modul berat dimuat saat startup: {', '.join(loaded) or 'tidak ada'}")
+    root.destroy()
+    if window_ms is None or window_ms > budget_ms:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
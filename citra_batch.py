@@ -0,0 +1,162 @@
+"""Batch processing of operation chains over many files.
+
+Setiap file dikerjakan penuh (decode -> operasi -> encode) oleh satu proses
+worker. Beberapa file selalu dalam proses sekaligus, sehingga decode satu
+file tumpang tindih dengan komputasi dan encode file lainnya.
+"""
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+
+import citra_engine as engine
+import citra_parallel
+import citra_tiles
+import citra_trace as trace
+from citra_pipeline import Pipeline
+
+# Per-process state, filled by _init_worker
+_worker_steps = None
+_worker_second = None
+_worker_executor = None
+
+
+def _init_worker(steps, second_path, tracing=False, threads=None, cv_threads=None):
+    """Prepare a worker process: set its threading, load the mask once
+
+    OpenCV is single-threaded unless cv_threads says otherwise: the pool
+    already provides the parallelism. threads > 1 also splits each image
+    into that many strips processed in parallel inside the worker.
+    """
+    global _worker_steps, _worker_second, _worker_executor
+    cv2.setNumThreads(cv_threads or 1)
+    _worker_executor = citra_parallel.StripExecutor(threads) if threads and threads > 1 else None
+    if tracing:
+        trace.enable()
+    _worker_steps = steps
+    # Decoded once per worker; resized once per input geometry
+    _worker_second = engine.MatchedImage(engine.load_image(second_path)) if second_path else None
+
+
+def _output_path(path, output_dir, ext):
+    """Build the output file name for an input file"""
+    stem, src_ext = os.path.splitext(os.path.basename(path))
+    return os.path.join(output_dir, stem + (ext or src_ext))
+
+
+def _process_file(path, output_dir, ext, tile_size=None, quality=None, compression=None):
+    """Decode, process and encode a single file inside a worker
+
+    Returns the trace events recorded for this file (empty unless tracing).
+    """
+    out_path = _output_path(path, output_dir, ext)
+    with trace.span('file', cat='file', file=os.path.basename(path)):
+        if tile_size:
+            # Out-of-core: read, process and write tile by tile
+            citra_tiles.process_tiled(path, _worker_steps, out_path, tile_size)
+        else:
+            image = engine.load_image(path)
+            apply = _worker_executor.apply if _worker_executor is not None else engine.apply_operations
+            result = apply(image, _worker_steps, second=_worker_second)
+            engine.save_image(out_path, result, quality, compression)
+    return trace.drain()
+
+
+def run_batch(pattern, steps, output_dir, workers=None, second_path=None, ext=None,
+              tile_size=None, quality=None, compression=None, threads=None, cv_threads=None, log=print):
+    """Run steps over every file matching pattern on a process pool
+
+    With tile_size, every file is processed out-of-core by citra_tiles
+    (input and output must be .npy or .tif). quality and compression are
+    the JPEG/WebP quality and PNG compression of the outputs. threads and
+    cv_threads set the strip threads and OpenCV threads of each worker, so
+    workers x (threads or cv_threads) should not exceed the cores. When
+    tracing is enabled in this process, the workers trace too and their
+    events are collected here. Returns (processed, failures, elapsed_seconds); failures is a
+    list of (path, error message).
+    """
+    files = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    if not files:
+        raise ValueError(f"Tidak ada file yang cocok dengan pola: {pattern}")
+    if ext and not ext.startswith('.'):
+        ext = '.' + ext
+    # Reject bad encoder and thread settings before starting the pool
+    if any(n is not None and n < 1 for n in (threads, cv_threads)):
+        raise ValueError("Jumlah thread minimal 1.")
+    engine.check_encoder_options(quality, compression)
+    if tile_size:
+        citra_tiles.check_tiled_steps(steps)
+    os.makedirs(output_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    # Keep a bounded number of files in flight so the queue never holds every path
+    max_pending = workers * 2
+    processed = 0
+    failures = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(steps, second_path, trace.is_enabled(), threads, cv_threads)) as pool:
+        pending = {}
+        remaining = iter(files)
+
+        def submit_next():
+            path = next(remaining, None)
+            if path is not None:
+                pending[pool.submit(_process_file, path, output_dir, ext, tile_size,
+                                     quality, compression)] = path
+
+        for _ in range(max_pending):
+            submit_next()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    trace.add_events(future.result())
+                    processed += 1
+                except Exception as e:
+                    failures.append((path, str(e)))
+                submit_next()
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    log(f"{processed}/{len(files)} file diproses dalam {elapsed:.2f} s ({rate:.1f} file/s)")
+    return processed, failures, elapsed
+
+
+def steps_from_args(args):
+    """Operation chain from --recipe followed by the --op entries"""
+    steps = []
+    if args.recipe:
+        steps = Pipeline.load(args.recipe).step_specs()
+    steps += [engine.parse_operation(spec) for spec in args.op]
+    if not steps:
+        raise ValueError("Minimal satu operasi (--op atau --recipe) diperlukan.")
+    return steps
+
+
+def main(args):
+    """Entry point for `citra.py --batch`, returns the process exit code"""
+    try:
+        steps = steps_from_args(args)
+        processed, failures, _ = run_batch(
+            args.batch, steps, args.output,
+            workers=args.workers, second_path=args.second, ext=args.format,
+            tile_size=args.tile, quality=args.quality, compression=args.png_compression,
+            threads=args.threads, cv_threads=args.cv_threads
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    for path, message in failures:
+        print(f"Gagal: {path}: {message}", file=sys.stderr)
+    if args.trace:
+        count = trace.export(args.trace)
+        print(f"Trace ({count} event) disimpan: {args.trace}")
+    return 1 if failures else 0
@@ -0,0 +1,277 @@
+"""Benchmark suite for the engine operations and the display path.
+
+Gambar sintetis (grayscale dan BGR, 1 sampai 100 MP) dibuat secara
+deterministik. Setiap operasi engine dan jalur tampilan (pyramid,
+render_display, PhotoImage) diukur waktunya (median beberapa pengulangan)
+dan puncak alokasi memorinya (tracemalloc). Hasil disimpan sebagai JSON;
+dengan --baseline hasil dibandingkan dengan run sebelumnya dan regresi
+ditandai (exit code 1).
+
+Contoh:
+    python citra_bench.py --sizes 1,4 --output baseline.json
+    python citra_bench.py --sizes 1,4 --baseline baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import citra_bitmap as bitmap
+import citra_engine as engine
+import citra_parallel
+
+BENCH_VERSION = 1
+DEFAULT_SIZES_MP = (1, 4, 16, 100)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+# Differences below this are timer noise, never a regression
+MIN_DELTA_MS = 0.5
+MIN_DELTA_MB = 1.0
+PANEL_SIZE = (800, 600)
+KINDS = ('gray', 'bgr')
+# Operations that cannot run with empty params ('masks' needs mask files)
+NEEDS_PARAMS = ('masks',)
+
+
+def benchmarked_operations():
+    """Names of the registered operations that run with their default params"""
+    return [name for name in engine.OPERATIONS if name not in NEEDS_PARAMS]
+
+
+def synthetic_image(megapixels, color, seed=0):
+    """Deterministic 4:3 test image with smooth regions and sharp edges"""
+    width = max(64, int(round((megapixels * 1e6 * 4 / 3) ** 0.5)))
+    height = max(48, int(round(megapixels * 1e6 / width)))
+    rng = np.random.default_rng(seed)
+    channels = 3 if color else 1
+    # Smooth texture from upscaled coarse noise
+    coarse = rng.integers(0, 256, (height // 64 + 2, width // 64 + 2, channels), dtype=np.uint8)
+    image = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_LINEAR)
+    # Diagonal lines give Canny and the morphology operations real work
+    step = max(16, width // 40)
+    for x in range(0, width, step):
+        cv2.line(image, (x, 0), (width - 1 - x, height - 1), (255,) * channels, 2)
+    return image
+
+
+def measure(func, repeat):
+    """Median/min wall time over repeat runs and the peak traced allocation"""
+    func()  # Warm-up: lazy initialisation and first-touch page faults
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    # Memory is measured in a separate run so tracing does not skew the timings
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'median_ms': round(statistics.median(times), 3),
+        'min_ms': round(min(times), 3),
+        'peak_mb': round(peak / 2 ** 20, 2),
+    }
+
+
+def _photo_image_factory():
+    """ImageTk.PhotoImage bound to a hidden Tk root, or None without a display"""
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        return None
+    return lambda image: ImageTk.PhotoImage(image, master=root)
+
+
+def bench_cases(image, second, photo_image=None):
+    """(name, callable) for every operation and each stage of the display path"""
+    cases = [(name, lambda name=name: engine.apply_operations(image, [(name, {})], second=second))
+             for name in benchmarked_operations()]
+    pyramid = engine.build_preview_pyramid(image)
+    panel_w, panel_h = PANEL_SIZE
+    mask = engine.convert_to_binary(image)
+    bits, bits2 = bitmap.pack(mask), bitmap.pack(engine.convert_to_binary(second))
+    cases += [
+        ('bitmap:pack', lambda: bitmap.pack(mask)),
+        ('bitmap:unpack', lambda: bits.to_array()),
+        ('bitmap:and', lambda: bits & bits2),
+        ('bitmap:dilate', lambda: bits.dilate('square')),
+        ('histogram', lambda: engine.compute_histogram(image)),
+        ('display:pyramid', lambda: engine.build_preview_pyramid(image)),
+        ('display:fit', lambda: engine.render_display(pyramid, panel_w, panel_h)),
+        ('display:zoom4', lambda: engine.render_display(pyramid, panel_w, panel_h, zoom=4.0)),
+    ]
+    if photo_image is not None:
+        cases.append(('display:photoimage',
+                      lambda: photo_image(engine.render_display(pyramid, panel_w, panel_h)[0])))
+    return cases
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES_MP, kinds=KINDS, repeat=DEFAULT_REPEAT, only=None, log=print):
+    """Run every case for every size and kind; returns {case key: measurement}"""
+    photo_image = _photo_image_factory()
+    if photo_image is None:
+        log("Tidak ada display: tahap PhotoImage dilewati.")
+    results = {}
+    for mp in sizes:
+        for kind in kinds:
+            image = synthetic_image(mp, kind == 'bgr', seed=0)
+            second = synthetic_image(mp, kind == 'bgr', seed=1)
+            for name, func in bench_cases(image, second, photo_image):
+                if only and name.split(':')[0] not in only and name not in only:
+                    continue
+                key = f"{name}/{kind}/{mp}MP"
+                results[key] = measure(func, repeat)
+                r = results[key]
+                log(f"{key:<32} {r['median_ms']:>10.2f} ms (min {r['min_ms']:.2f})  "
+                    f"puncak {r['peak_mb']:.1f} MB")
+            del image, second
+    return results
+
+
+def run_speedups(sizes, kinds, threads, cv_threads=1, repeat=DEFAULT_REPEAT, only=None, log=print):
+    """Whole-image vs strip-parallel time of every operation; returns {case key: measurement}
+
+    Strip runs use threads strip threads with cv_threads OpenCV threads;
+    whole-image runs keep OpenCV's current setting.
+    """
+    results = {}
+    with citra_parallel.StripExecutor(threads) as executor:
+        for mp in sizes:
+            for kind in kinds:
+                image = synthetic_image(mp, kind == 'bgr', seed=0)
+                second = synthetic_image(mp, kind == 'bgr', seed=1)
+                for name in benchmarked_operations():
+                    if only and name not in only:
+                        continue
+                    key = f"strips:{name}/{kind}/{mp}MP"
+                    m = citra_parallel.measure_speedup(image, [(name, {})], executor, repeat, cv_threads,
+                                                       second=second)
+                    results[key] = {'median_ms': m['strips_ms'], 'serial_ms': m['serial_ms'],
+                                    'speedup': m['speedup'], 'identical': m['identical']}
+                    log(citra_parallel.format_speedup(key, m))
+                del image, second
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Cases that got slower or use more memory than baseline by more than threshold
+
+    Returns a list of (key, metric, baseline value, current value). Only
+    cases present in both runs are compared.
+    """
+    regressions = []
+    for key, current in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for metric, min_delta in (('median_ms', MIN_DELTA_MS), ('peak_mb', MIN_DELTA_MB)):
+            before, after = old.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append((key, metric, before, after))
+    return regressions
+
+
+def load_results(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Tidak dapat membaca hasil benchmark: {str(e)}")
+    if not isinstance(data, dict) or data.get('version') != BENCH_VERSION:
+        raise ValueError("Format atau versi hasil benchmark tidak didukung.")
+    return data
+
+
+def save_results(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': BENCH_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'environment': environment(),
+            'results': results,
+        }, f, indent=2)
+
+
+def _parse_sizes(text):
+    try:
+        sizes = [float(part) for part in text.split(',') if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ukuran harus berupa angka MP, mis. 1,4,16: {text}")
+    return [int(mp) if mp.is_integer() else mp for mp in sizes]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark operasi dan jalur tampilan F.A.I.T Vision")
+    parser.add_argument("--sizes", type=_parse_sizes, default=list(DEFAULT_SIZES_MP),
+                        help="ukuran gambar dalam megapiksel (default: 1,4,16,100)")
+    parser.add_argument("--kinds", default=','.join(KINDS), help="gray, bgr atau keduanya")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="jumlah pengulangan per kasus")
+    parser.add_argument("--only", metavar="NAMES",
+                        help="hanya kasus tertentu, mis. edge,display (dipisah koma)")
+    parser.add_argument("--output", "-o", default="citra_bench.json", help="file JSON hasil")
+    parser.add_argument("--baseline", metavar="JSON", help="hasil sebelumnya untuk mendeteksi regresi")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="batas kenaikan relatif sebelum dianggap regresi (default 0.10)")
+    parser.add_argument("--strips", type=int, metavar="THREADS",
+                        help="juga ukur percepatan setiap operasi bila diproses sebagai strip paralel")
+    parser.add_argument("--cv-threads", type=int, default=1, metavar="N",
+                        help="thread OpenCV di dalam strip pada --strips (default 1)")
+    args = parser.parse_args(argv)
+
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    if not kinds or any(kind not in KINDS for kind in kinds):
+        parser.error(f"--kinds harus berisi: {', '.join(KINDS)}")
+    only = set(args.only.split(',')) if args.only else None
+
+    try:
+        baseline = load_results(args.baseline)['results'] if args.baseline else None
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    results = run_benchmarks(args.sizes, kinds, args.repeat, only)
+    if args.strips:
+        print(f"Percepatan strip paralel ({args.strips} thread, {args.cv_threads} thread OpenCV per strip):")
+        results.update(run_speedups(args.sizes, kinds, args.strips, args.cv_threads, args.repeat, only))
+    save_results(args.output, results)
+    print(f"Hasil disimpan: {args.output}")
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for key, metric, before, after in regressions:
+        unit = 'ms' if metric == 'median_ms' else 'MB'
+        print(f"REGRESI {key} {metric}: {before:.2f} -> {after:.2f} {unit} ({after / before - 1:+.0%})")
+    if not regressions:
+        print(f"Tidak ada regresi dibanding {args.baseline} (batas {args.threshold:.0%}).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Bit-packed binary images.
+
+Citra biner (0/255) disimpan 1 bit per piksel: setiap baris dikemas
+(np.packbits) ke dalam word 64-bit, delapan kali lebih hemat memori dibanding
+array uint8. Operasi logika (AND/OR/XOR/NOT) dan dilasi/erosi hingga 3x3
+dikerjakan langsung pada word tersebut; dilasi/erosi memakai pergeseran bit
+antar kolom dan penggabungan antar baris. Data baru dibongkar ke uint8 untuk
+ditampilkan atau disimpan (to_array()).
+"""
+import numpy as np
+
+import citra_morphology as morph
+
+# Pixel x of a row is bit x % 64 of word x // 64
+WORD = np.dtype('<u8')
+_ONE = np.uint64(1)
+_TOP = np.uint64(63)
+
+
+def _tail_mask(width):
+    """Mask of the valid bits in the last word of a row"""
+    used = width % 64
+    return np.uint64(0xFFFFFFFFFFFFFFFF if used == 0 else (1 << used) - 1)
+
+
+class BitImage:
+    """Binary image with one bit per pixel, each row packed into 64-bit words
+
+    Padding bits after the last pixel of each row are always zero, so two
+    BitImages of the same shape can be compared and combined word-wise.
+    """
+    __slots__ = ('words', 'width')
+
+    def __init__(self, words, width):
+        self.words = words
+        self.width = width
+
+    @classmethod
+    def from_array(cls, image):
+        """Pack a single-channel mask; every nonzero pixel becomes 1"""
+        if image.ndim != 2:
+            raise ValueError("Citra biner terkemas harus satu kanal (grayscale/biner).")
+        height, width = image.shape
+        words = np.zeros((height, (width + 63) // 64), dtype=WORD)
+        packed = np.packbits(image, axis=1, bitorder='little')
+        words.view(np.uint8)[:, :packed.shape[1]] = packed
+        return cls(words, width)
+
+    def to_array(self):
+        """Unpack to a uint8 array of 0/255, for display and export"""
+        unpacked = np.unpackbits(self.words.view(np.uint8), axis=1, count=self.width, bitorder='little')
+        return np.multiply(unpacked, 255, out=unpacked)
+
+    @property
+    def shape(self):
+        return (self.words.shape[0], self.width)
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def count(self):
+        """Number of foreground (1) pixels"""
+        return int(np.unpackbits(self.words.view(np.uint8)).sum(dtype=np.int64))
+
+    def copy(self):
+        return BitImage(self.words.copy(), self.width)
+
+    # --- Logic ---
+
+    def _other(self, other):
+        if not isinstance(other, BitImage):
+            return None
+        if other.shape != self.shape:
+            raise ValueError(f"Ukuran citra biner berbeda: {self.shape} dan {other.shape}")
+        return other.words
+
+    def __and__(self, other):
+        words = self._other(other)
+        if words is None:
+            return NotImplemented
+        return BitImage(np.bitwise_and(self.words, words), self.width)
+
+    def __or__(self, other):
+        words = self._other(other)
+        if words is None:
+            return NotImplemented
+        return BitImage(np.bitwise_or(self.words, words), self.width)
+
+    def __xor__(self, other):
+        words = self._other(other)
+        if words is None:
+            return NotImplemented
+        return BitImage(np.bitwise_xor(self.words, words), self.width)
+
+    # In place, for accumulating many masks into one buffer
+    def __iand__(self, other):
+        words = self._other(other)
+        if words is None:
+            return NotImplemented
+        np.bitwise_and(self.words, words, out=self.words)
+        return self
+
+    def __ior__(self, other):
+        words = self._other(other)
+        if words is None:
+            return NotImplemented
+        np.bitwise_or(self.words, words, out=self.words)
+        return self
+
+    def __ixor__(self, other):
+        words = self._other(other)
+        if words is None:
+            return NotImplemented
+        np.bitwise_xor(self.words, words, out=self.words)
+        return self
+
+    def invert(self, out=None):
+        """NOT, written into out (a BitImage of the same shape, may be self) if given"""
+        if out is None:
+            out = BitImage(np.empty_like(self.words), self.width)
+        elif out.shape != self.shape:
+            raise ValueError(f"Ukuran citra biner berbeda: {self.shape} dan {out.shape}")
+        np.invert(self.words, out=out.words)
+        out.words[:, -1] &= _tail_mask(self.width)
+        return out
+
+    def __invert__(self):
+        return self.invert()
+
+    def __eq__(self, other):
+        if not isinstance(other, BitImage):
+            return NotImplemented
+        return self.shape == other.shape and np.array_equal(self.words, other.words)
+
+    __hash__ = None
+
+    # --- Morphology ---
+
+    def dilate(self, kernel='square', iterations=1):
+        """Dilation with a structuring element of at most 3x3 (name or 0/1 array)"""
+        return self._morphology(kernel, iterations, np.bitwise_or, fill=False)
+
+    def erode(self, kernel='square', iterations=1):
+        """Erosion with a structuring element of at most 3x3 (name or 0/1 array)
+
+        Pixels outside the image count as foreground, as in cv2.erode.
+        """
+        return self._morphology(kernel, iterations, np.bitwise_and, fill=True)
+
+    def _morphology(self, kernel, iterations, combine, fill):
+        if not isinstance(kernel, np.ndarray):
+            kernel = morph.structuring_element(kernel, 3)
+        if kernel.ndim != 2 or kernel.shape[0] > 3 or kernel.shape[1] > 3 or not kernel.any():
+            raise ValueError("Morfologi terkemas hanya mendukung elemen struktur hingga 3x3.")
+        # Column offsets read per row offset, anchored at the centre like OpenCV
+        rows = {}
+        for i, j in zip(*np.nonzero(kernel)):
+            rows.setdefault(i - kernel.shape[0] // 2, []).append(j - kernel.shape[1] // 2)
+
+        words = self.words
+        tail = _tail_mask(self.width)
+        identity = ~np.uint64(0) if fill else np.uint64(0)
+        for _ in range(int(iterations)):
+            if fill:
+                # Padding bits stand in for the outside of the image
+                words = words.copy()
+                words[:, -1] |= ~tail
+            columns = {dx: _shift_columns(words, dx, fill) for dx in set().union(*rows.values())}
+            # Rows outside the image are the identity of combine, so the
+            # edge rows of result are simply left alone
+            result = np.full_like(words, identity)
+            combined = {}  # Rows with the same column offsets share one combination
+            for dy, dxs in rows.items():
+                row = combined.get(tuple(dxs))
+                if row is None:
+                    row = columns[dxs[0]]
+                    for dx in dxs[1:]:
+                        row = combine(row, columns[dx])
+                    combined[tuple(dxs)] = row
+                if dy == 0:
+                    combine(result, row, out=result)
+                elif dy > 0:
+                    combine(result[:-dy], row[dy:], out=result[:-dy])
+                else:
+                    combine(result[-dy:], row[:dy], out=result[-dy:])
+            result[:, -1] &= tail
+            words = result
+        return BitImage(words, self.width)
+
+
+def _shift_columns(words, dx, fill):
+    """out[:, x] = words[:, x + dx] for dx in -1, 0, 1; fill enters at the border
+
+    The shift runs over the flattened rows; the one word per row that took
+    its carry from the neighbouring row is fixed up afterwards.
+    """
+    if dx == 0:
+        return words
+    flat = words.reshape(-1)
+    out = np.empty_like(flat)
+    carry = np.empty_like(flat)
+    edge = _ONE if fill else np.uint64(0)
+    if dx == 1:
+        np.right_shift(flat, _ONE, out=out)
+        np.left_shift(flat[1:], _TOP, out=carry[:-1])
+        out[:-1] |= carry[:-1]
+        out = out.reshape(words.shape)
+        out[:, -1] = (words[:, -1] >> _ONE) | (edge << _TOP)
+    else:
+        np.left_shift(flat, _ONE, out=out)
+        np.right_shift(flat[:-1], _TOP, out=carry[1:])
+        out[1:] |= carry[1:]
+        out = out.reshape(words.shape)
+        out[:, 0] = (words[:, 0] << _ONE) | edge
+    return out
+
+
+def pack(image):
+    """BitImage of a mask, or image itself if it already is one"""
+    return image if isinstance(image, BitImage) else BitImage.from_array(image)
+
+
+def as_array(image):
+    """uint8 array for display/export; BitImages are unpacked, arrays pass through"""
+    return image.to_array() if isinstance(image, BitImage) else image
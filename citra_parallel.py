@@ -0,0 +1,191 @@
+"""Strip-parallel execution of operation chains.
+
+Gambar dibagi menjadi strip horizontal. Setiap strip dibaca bersama baris
+halo (engine.operations_halo) agar operasi ketetanggaan melihat konteks
+yang sama dengan proses satu gambar utuh, lalu diproses di thread pool
+(OpenCV dan numpy melepas GIL). Hanya baris milik strip itu sendiri yang
+ditulis ke array output.
+
+Jumlah thread OpenCV (cv2.setNumThreads) diatur secara eksplisit: bila
+strip sudah dijalankan paralel, thread internal OpenCV sebaiknya 1 agar
+kedua tingkat paralelisme tidak saling berebut core.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+import citra_engine as engine
+
+# Strips thinner than this cost more in halo and dispatch than they save
+MIN_STRIP_ROWS = 64
+# Operations that always run on the whole image: 'masks' reads mask files
+# matched to the whole image, and Canny's hysteresis follows edges
+# arbitrarily far, beyond any fixed halo
+WHOLE_IMAGE_OPERATIONS = ('masks', 'edge')
+
+
+def set_cv_threads(threads):
+    """Set OpenCV's internal thread count (1 = single-threaded); returns the previous one"""
+    previous = cv2.getNumThreads()
+    if threads is not None:
+        if threads < 1:
+            raise ValueError("Jumlah thread OpenCV minimal 1.")
+        cv2.setNumThreads(int(threads))
+    return previous
+
+
+@contextmanager
+def opencv_threads(threads):
+    """Temporarily run OpenCV with the given thread count"""
+    previous = set_cv_threads(threads)
+    try:
+        yield
+    finally:
+        cv2.setNumThreads(previous)
+
+
+def strip_bounds(height, strips):
+    """(y, h) of strips rows-wise covering height rows, as even as possible"""
+    strips = max(1, min(int(strips), height))
+    edges = [height * i // strips for i in range(strips + 1)]
+    return [(y0, y1 - y0) for y0, y1 in zip(edges, edges[1:])]
+
+
+def _full_size(second, image):
+    """second at image's height and width (channels kept), for slicing into strips"""
+    shape = image.shape[:2] + second.shape[2:]
+    if isinstance(second, engine.MatchedImage):
+        return second.matched(shape)
+    return engine.match_shape(second, shape)
+
+
+class StripExecutor:
+    """Runs operation chains on horizontal strips of an image, on a thread pool
+
+    apply() is a drop-in replacement for engine.apply_operations with the
+    same result: steps in WHOLE_IMAGE_OPERATIONS, whose reach no halo
+    bounds, are run on the whole image between strip runs. strips defaults
+    to one per thread; images too small for that many strips of at least
+    min_rows rows use fewer, down to a plain whole-image run.
+    """
+
+    def __init__(self, threads=None, strips=None, min_rows=MIN_STRIP_ROWS):
+        self.threads = threads or os.cpu_count() or 1
+        if self.threads < 1:
+            raise ValueError("Jumlah thread strip minimal 1.")
+        self.strips = strips or self.threads
+        self.min_rows = min_rows
+        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="citra-strip")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def strip_count(self, height, halo=0):
+        """Strips used for an image of height rows and a chain with this halo"""
+        # Each strip should be mostly its own rows, not re-read halo
+        rows = max(self.min_rows, 2 * halo)
+        return max(1, min(self.strips, height // rows))
+
+    def apply(self, image, steps, second=None, cancel_event=None):
+        """engine.apply_operations, with each run of strip-safe steps split into strips"""
+        index = 0
+        while index < len(steps):
+            whole = steps[index][0] in WHOLE_IMAGE_OPERATIONS
+            end = index + 1
+            while end < len(steps) and (steps[end][0] in WHOLE_IMAGE_OPERATIONS) == whole:
+                end += 1
+            if whole:
+                image = engine.apply_operations(image, steps[index:end], second, cancel_event)
+            else:
+                image = self._apply_strips(image, steps[index:end], second, cancel_event)
+            index = end
+        return image
+
+    def _apply_strips(self, image, steps, second, cancel_event):
+        height = image.shape[0]
+        halo = engine.operations_halo(steps)
+        bounds = strip_bounds(height, self.strip_count(height, halo))
+        if len(bounds) == 1:
+            return engine.apply_operations(image, steps, second, cancel_event)
+        if not any(engine.OPERATIONS[name][1] for name, _ in steps):
+            second = None
+        elif second is not None:
+            # Matched once to the full frame, so every strip slices the same pixels
+            second = _full_size(second, image)
+
+        output = []
+        lock = threading.Lock()
+
+        def run(bound):
+            y, h = bound
+            y0, y1 = max(0, y - halo), min(height, y + h + halo)
+            result = engine.apply_operations(image[y0:y1], steps,
+                                             second[y0:y1] if second is not None else None,
+                                             cancel_event)
+            core = result[y - y0:y - y0 + h]
+            with lock:
+                if not output:
+                    output.append(np.empty((height,) + core.shape[1:], dtype=core.dtype))
+            output[0][y:y + h] = core
+
+        for _ in self._pool.map(run, bounds):
+            pass
+        return output[0]
+
+
+def measure_speedup(image, steps, executor, repeat=3, cv_threads_in_strips=1, second=None):
+    """Median ms of a whole-image run and a strip run of steps, and whether they match
+
+    The whole-image run uses OpenCV's current thread setting; the strip
+    run uses cv_threads_in_strips OpenCV threads inside each strip.
+    """
+    def median_ms(func):
+        times = []
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            times.append((time.perf_counter() - start) * 1000)
+        return sorted(times)[len(times) // 2], result
+
+    serial_ms, expected = median_ms(lambda: engine.apply_operations(image, steps, second))
+    with opencv_threads(cv_threads_in_strips):
+        strip_ms, actual = median_ms(lambda: executor.apply(image, steps, second))
+    return {
+        'serial_ms': serial_ms,
+        'strips_ms': strip_ms,
+        'speedup': serial_ms / strip_ms if strip_ms > 0 else 0.0,
+        'identical': bool(np.array_equal(expected, actual)),
+    }
+
+
+def format_speedup(name, measurement):
+    m = measurement
+    note = "" if m['identical'] else "  (hasil berbeda di batas strip)"
+    return (f"{name:<32} {m['serial_ms']:>10.2f} ms -> {m['strips_ms']:>8.2f} ms  "
+            f"x{m['speedup']:.2f}{note}")
+
+
+def configure(threads=None, cv_threads=None):
+    """Apply --threads/--cv-threads; returns a StripExecutor, or None for whole-image runs
+
+    With strip threads and no explicit OpenCV count, OpenCV is made
+    single-threaded so the two pools do not oversubscribe the cores.
+    """
+    if threads is not None and threads < 1:
+        raise ValueError("Jumlah thread strip minimal 1.")
+    if cv_threads is None and threads and threads > 1:
+        cv_threads = 1
+    set_cv_threads(cv_threads)
+    return StripExecutor(threads) if threads and threads > 1 else None
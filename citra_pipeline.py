@@ -0,0 +1,355 @@
+"""Chainable operation pipeline with incremental recomputation.
+
+Setiap langkah pipeline adalah satu operasi engine beserta parameternya dan
+menyimpan hasilnya. Mengubah parameter sebuah langkah hanya menghitung ulang
+langkah itu dan langkah-langkah sesudahnya. Pipeline dapat disimpan sebagai
+resep JSON dan diputar ulang tanpa GUI pada gambar lain.
+"""
+import json
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import citra_bitmap as bitmap
+import citra_engine as engine
+
+RECIPE_VERSION = 1
+DEFAULT_HISTORY_BYTES = 64 * 1024 * 1024
+
+
+class PipelineStep:
+    """One node of the pipeline: an engine operation, its params and cached output
+
+    Outputs of steps that produce a binary mask are kept bit-packed.
+    """
+
+    def __init__(self, name, params=None):
+        if name not in engine.OPERATIONS:
+            raise ValueError(f"Operasi tidak dikenal: {name}. Pilihan: {', '.join(engine.OPERATIONS)}")
+        self.name = name
+        self.params = dict(params or {})
+        self.output = None
+
+    def keep(self, output):
+        """Form in which output is cached for this step"""
+        if output.ndim == 2 and engine.produces_binary(self.name, self.params):
+            return bitmap.pack(output)
+        return output
+
+    @property
+    def needs_second(self):
+        return engine.OPERATIONS[self.name][1]
+
+    def describe(self):
+        if not self.params:
+            return self.name
+        args = ", ".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}({args})"
+
+
+class Pipeline:
+    """Ordered chain of PipelineSteps applied to a source image
+
+    Outputs are cached per step. Any edit bumps a revision counter; a run
+    that started before the edit never writes its (now stale) outputs back,
+    so a pipeline can be edited on the Tk thread while an older run is still
+    finishing on a worker thread.
+    """
+
+    def __init__(self, steps=None, executor=None):
+        self.steps = list(steps or [])
+        self.source = None
+        self.second = None
+        # e.g. a citra_parallel.StripExecutor; None runs steps on the whole image
+        self.executor = executor
+        self._revision = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def revision(self):
+        return self._revision
+
+    def invalidate(self, start=0):
+        """Drop cached outputs of step start and every step after it"""
+        with self._lock:
+            self._revision += 1
+            for step in self.steps[start:]:
+                step.output = None
+
+    # --- Editing ---
+
+    def set_source(self, image, second=None):
+        """Set the input images; only the steps they affect are invalidated"""
+        if image is not self.source:
+            self.source, self.second = image, second
+            self.invalidate(0)
+        elif second is not self.second:
+            self.second = second
+            first = next((i for i, s in enumerate(self.steps) if s.needs_second), len(self.steps))
+            self.invalidate(first)
+
+    def append(self, name, params=None):
+        """Add a step at the end; earlier cached outputs stay valid"""
+        step = PipelineStep(name, params)
+        with self._lock:
+            self._revision += 1
+            self.steps.append(step)
+        return len(self.steps) - 1
+
+    def set_params(self, index, params):
+        """Update params of one step and invalidate it and everything after"""
+        self.steps[index].params.update(params)
+        self.invalidate(index)
+
+    def remove(self, index):
+        del self.steps[index]
+        self.invalidate(index)
+
+    def reset(self, steps=()):
+        """Replace all steps, e.g. to start a new chain"""
+        with self._lock:
+            self._revision += 1
+            self.steps = [PipelineStep(name, params) for name, params in steps]
+
+    def prime(self, index, output, revision):
+        """Store an output computed elsewhere, if the pipeline is unchanged since revision"""
+        with self._lock:
+            if revision != self._revision:
+                return
+            step = self.steps[index]
+        kept = step.keep(output)
+        with self._lock:
+            if revision == self._revision:
+                step.output = kept
+
+    # --- Execution ---
+
+    def run(self, cancel_event=None):
+        """Return the final output, recomputing only steps without a cached output"""
+        with self._lock:
+            revision = self._revision
+            steps = list(self.steps)
+            source, second = self.source, self.second
+        if source is None:
+            raise ValueError("Pipeline belum memiliki gambar sumber.")
+
+        # Resume from the last step that still has a valid output
+        start = len(steps)
+        while start > 0 and steps[start - 1].output is None:
+            start -= 1
+        image = bitmap.as_array(steps[start - 1].output) if start > 0 else source
+
+        apply = self.executor.apply if self.executor is not None else engine.apply_operations
+        index = start
+        while index < len(steps):
+            # A run of point operations is computed in one LUT pass; only the
+            # last step of the run keeps its output
+            end = max(index + 1, engine.point_run_end(self._specs(steps), index))
+            image = apply(image, self._specs(steps[index:end]),
+                          second=second, cancel_event=cancel_event)
+            kept = steps[end - 1].keep(image)
+            with self._lock:
+                if revision == self._revision:
+                    steps[end - 1].output = kept
+            index = end
+        return image
+
+    @staticmethod
+    def _specs(steps):
+        return [(step.name, step.params) for step in steps]
+
+    def describe(self):
+        return " → ".join(step.describe() for step in self.steps) or "(kosong)"
+
+    def step_specs(self):
+        """Steps as (name, params) pairs, as used by engine.apply_operations"""
+        return [(step.name, dict(step.params)) for step in self.steps]
+
+    # --- Recipes ---
+
+    def to_recipe(self):
+        return {
+            'version': RECIPE_VERSION,
+            'steps': [{'op': name, 'params': params} for name, params in self.step_specs()],
+        }
+
+    @classmethod
+    def from_recipe(cls, recipe):
+        if not isinstance(recipe, dict) or recipe.get('version') != RECIPE_VERSION:
+            raise ValueError("Format atau versi resep tidak didukung.")
+        try:
+            return cls(PipelineStep(item['op'], item.get('params')) for item in recipe['steps'])
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Resep tidak valid: {str(e)}")
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_recipe(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                recipe = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Tidak dapat membaca resep: {str(e)}")
+        return cls.from_recipe(recipe)
+
+
+class PipelineHistory:
+    """Memory-bounded undo/redo over pipeline states
+
+    Every entry is only a list of (name, params) steps, so entries cost a
+    few bytes. Every checkpoint_interval-th entry additionally keeps a
+    PNG-compressed copy of its output (compressed on a background thread).
+    Restoring an entry seeds the pipeline from the longest step prefix
+    that has a checkpoint and recomputes only the remaining steps.
+    Compressed checkpoints stay within max_bytes; the least recently used
+    ones are dropped first. History belongs to one source image; call
+    clear() when the source changes, and second_changed() when the second
+    image changes. Checkpoints that fail to encode are counted in
+    failed_checkpoints (last_checkpoint_error keeps the latest error).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_HISTORY_BYTES, checkpoint_interval=3, max_entries=200):
+        self.max_bytes = max_bytes
+        self.checkpoint_interval = checkpoint_interval
+        self.max_entries = max_entries
+        self._entries = []
+        self._position = -1
+        self._recorded = 0  # States recorded so far; unlike len(_entries), never capped
+        self._checkpoints = OrderedDict()  # prefix key -> encoded PNG bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="citra-history")
+        self._generation = 0
+        self._second_generation = 0
+        self.failed_checkpoints = 0
+        self.last_checkpoint_error = None
+
+    def _key(self, specs):
+        # Prefixes with a step reading the second image are only valid for that image
+        uses_second = any(engine.OPERATIONS[name][1] for name, _ in specs)
+        return json.dumps([specs, self._second_generation if uses_second else None], sort_keys=True)
+
+    def second_changed(self):
+        """Drop checkpoints computed with the previous second image"""
+        with self._lock:
+            self._second_generation += 1
+            for key in [key for key in self._checkpoints if json.loads(key)[1] is not None]:
+                self._bytes -= self._checkpoints.pop(key).nbytes
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._position = -1
+            self._recorded = 0
+            self._checkpoints.clear()
+            self._bytes = 0
+            # Compressions still queued for the old source are discarded
+            self._generation += 1
+
+    def can_undo(self):
+        return self._position > 0
+
+    def can_redo(self):
+        return self._position < len(self._entries) - 1
+
+    def record(self, specs, output=None):
+        """Record a new state (dropping the redo tail); output may become a checkpoint"""
+        if self._position >= 0 and self._entries[self._position] == specs:
+            return
+        del self._entries[self._position + 1:]
+        self._entries.append(specs)
+        if len(self._entries) > self.max_entries:
+            del self._entries[0]
+        self._position = len(self._entries) - 1
+        self._recorded += 1
+
+        if output is not None and specs and self._recorded % self.checkpoint_interval == 0:
+            self._encoder.submit(self._store_checkpoint, self._key(specs), output, self._generation)
+
+    def _store_checkpoint(self, key, output, generation):
+        # Runs on the encoder thread, where an exception would be lost with its future
+        try:
+            # OpenCV would silently squeeze other depths into 8 bits
+            if output.dtype not in (np.uint8, np.uint16):
+                raise ValueError(f"tipe data {output.dtype} tidak dapat disimpan sebagai PNG")
+            ok, encoded = cv2.imencode('.png', output, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+            if not ok:
+                raise ValueError("cv2.imencode gagal")
+        except Exception as e:
+            # The entry just restores from an earlier checkpoint instead
+            with self._lock:
+                self.failed_checkpoints += 1
+                self.last_checkpoint_error = e
+            print(f"Checkpoint riwayat gagal disimpan: {e}", file=sys.stderr)
+            return
+        if encoded.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation or key in self._checkpoints:
+                return
+            self._checkpoints[key] = encoded
+            self._bytes += encoded.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._checkpoints.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def undo(self):
+        """Step back; returns the specs to restore, or None"""
+        if not self.can_undo():
+            return None
+        self._position -= 1
+        return self._entries[self._position]
+
+    def redo(self):
+        """Step forward; returns the specs to restore, or None"""
+        if not self.can_redo():
+            return None
+        self._position += 1
+        return self._entries[self._position]
+
+    def _nearest_checkpoint(self, specs):
+        """(step index, encoded output) of the longest checkpointed prefix of specs"""
+        with self._lock:
+            for length in range(len(specs), 0, -1):
+                key = self._key(specs[:length])
+                encoded = self._checkpoints.get(key)
+                if encoded is not None:
+                    self._checkpoints.move_to_end(key)
+                    return length - 1, encoded
+        return None
+
+    def restore(self, pipeline, specs):
+        """Reset pipeline to specs and return a rebuild(cancel_event) job
+
+        The job decodes the nearest checkpoint and recomputes only the steps
+        after it; run it off the Tk thread.
+        """
+        pipeline.reset(specs)
+        revision = pipeline.revision
+        found = self._nearest_checkpoint(specs)
+
+        def rebuild(cancel_event=None):
+            if found is not None:
+                index, encoded = found
+                output = cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED)
+                output.flags.writeable = False
+                pipeline.prime(index, output, revision)
+            return pipeline.run(cancel_event)
+        return rebuild
+
+    def shutdown(self):
+        self._encoder.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,189 @@
+"""Thumbnails for the folder browser, with a persistent on-disk cache.
+
+Thumbnail dibuat dengan decode tereduksi (JPEG memakai DCT scaling lewat
+PIL draft mode, format lain diperkecil langsung saat decode bila didukung)
+dan disimpan sebagai JPEG kecil di direktori cache pengguna. Kunci cache
+adalah hash dari path absolut, ukuran file dan waktu modifikasi
+(mtime_ns), sehingga membuka ulang folder hanya perlu stat() per file dan
+hanya file baru atau yang berubah yang didekode ulang. Cache dibatasi
+ukurannya: entri yang paling lama tidak dipakai dihapus lebih dulu.
+"""
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+THUMB_SIZE = 128
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+CACHE_QUALITY = 85
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Per-user cache directory (XDG_CACHE_HOME, LOCALAPPDATA or ~/.cache)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'citra-thumbs')
+
+
+def list_images(folder):
+    """Image files directly inside folder, sorted by name"""
+    try:
+        entries = list(os.scandir(folder))
+    except OSError as e:
+        raise ValueError(f"Tidak dapat membuka folder: {folder}\nError: {str(e)}")
+    return sorted((entry.path for entry in entries
+                   if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)),
+                  key=lambda path: os.path.basename(path).lower())
+
+
+def make_thumbnail(path, size=THUMB_SIZE):
+    """Decode path at reduced resolution into an RGB or L PIL image of at most size x size"""
+    try:
+        with Image.open(path) as img:
+            # JPEG decodes straight to 1/2, 1/4 or 1/8 scale; a no-op elsewhere
+            img.draft('L' if img.mode == 'L' else 'RGB', (size, size))
+            img.thumbnail((size, size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+            return img.convert('L' if img.mode == 'L' else 'RGB')
+    except Exception:
+        pass
+    # Formats PIL cannot read (e.g. some TIFFs): full decode through OpenCV
+    import cv2
+    import citra_engine as engine
+    image = engine.load_image(path)
+    h, w = image.shape[:2]
+    scale = min(1.0, size / max(h, w))
+    image = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                       interpolation=cv2.INTER_AREA)
+    if image.ndim == 2:
+        return Image.fromarray(image)
+    return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+
+class ThumbnailCache:
+    """Thumbnails of image files, stored as small JPEGs under cache_dir
+
+    Entries are keyed by (absolute path, size, mtime_ns, thumbnail size): a
+    modified or replaced file gets a new key and is decoded again, an
+    unchanged one is read back from the cache without touching the file.
+    Entries of edited or deleted files are left behind until prune()
+    removes the least recently used entries beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir=None, size=THUMB_SIZE, max_bytes=DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.size = size
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, path):
+        st = os.stat(path)
+        key = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}\0{self.size}"
+        digest = hashlib.sha1(key.encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + '.jpg')
+
+    def cached(self, path):
+        """The cached thumbnail of path, or None if it has none for this version of the file"""
+        entry = self._entry_path(path)
+        try:
+            with Image.open(entry) as img:
+                img.load()
+        except Exception:
+            return None  # Missing, or corrupt: decoded again and overwritten
+        try:
+            os.utime(entry)  # Marks it recently used for prune()
+        except OSError:
+            pass
+        self.hits += 1
+        return img
+
+    def get(self, path):
+        """Thumbnail of path, decoding and storing it when not cached"""
+        thumb = self.cached(path)
+        if thumb is not None:
+            return thumb
+        thumb = make_thumbnail(path, self.size)
+        self.misses += 1
+        self._store(self._entry_path(path), thumb)
+        return thumb
+
+    @staticmethod
+    def _store(entry, thumb):
+        # Written to a temporary name first so a reader never sees half a file
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                thumb.save(f, 'JPEG', quality=CACHE_QUALITY)
+            os.replace(tmp, entry)
+        except OSError:
+            pass  # Read-only or full cache: the thumbnail is just not kept
+
+    def prune(self):
+        """Delete the least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def load_thumbnails(paths, cache, deliver, cancel_event=None, workers=None):
+    """Call deliver(path, thumbnail) for every path, cached thumbnails first
+
+    Cached thumbnails are read in order on the calling thread; the rest are
+    decoded on a pool of workers threads and delivered as they finish, from
+    those threads. A file that cannot be read is delivered with None.
+    Returns early once cancel_event is set. When anything was decoded, the
+    cache is pruned to its size limit afterwards.
+    """
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    missing = []
+    for path in paths:
+        if cancelled():
+            return
+        try:
+            thumb = cache.cached(path)
+        except Exception:
+            thumb = None  # Vanished since listing or a bad entry; decode() reports it
+        if thumb is None:
+            missing.append(path)
+        else:
+            deliver(path, thumb)
+
+    def decode(path):
+        if cancelled():
+            return
+        try:
+            thumb = cache.get(path)
+        except Exception:
+            thumb = None
+        deliver(path, thumb)
+
+    with ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                            thread_name_prefix="citra-thumbs") as pool:
+        for _ in pool.map(decode, missing):
+            pass
+    if missing:
+        cache.prune()
@@ -0,0 +1,143 @@
+"""Tiled out-of-core processing for images larger than RAM.
+
+Input dibaca per tile (memory-mapped atau decode per chunk), operasi
+dijalankan per tile dengan halo overlap untuk operasi ketetanggaan, dan
+hasilnya langsung ditulis ke file output yang juga memory-mapped. Puncak
+memori dibatasi oleh ukuran tile, bukan ukuran gambar.
+
+Format yang didukung:
+- .npy (BGR atau grayscale, dibaca lewat np.load(mmap_mode='r'))
+- .tif/.tiff (RGB atau grayscale, memerlukan paket opsional `tifffile`;
+  TIFF terkompresi juga memerlukan `zarr`)
+"""
+import os
+
+import numpy as np
+
+import citra_engine as engine
+
+DEFAULT_TILE_SIZE = 2048
+TILED_EXTENSIONS = ('.npy', '.tif', '.tiff')
+# Operations whose result at a pixel can depend on pixels arbitrarily far away
+UNTILED_OPERATIONS = ('edge',)
+
+
+def _is_tiff(path):
+    return path.lower().endswith(('.tif', '.tiff'))
+
+
+def _import_tifffile():
+    try:
+        import tifffile
+    except ImportError:
+        raise ValueError("Mode tile untuk TIFF memerlukan paket 'tifffile' (pip install tifffile).")
+    return tifffile
+
+
+def open_tiled_source(path):
+    """Open an image for lazy, region-by-region reading
+
+    Returns (array, rgb) where array supports numpy slicing without decoding
+    the whole image and rgb tells whether channels are stored as RGB.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return np.load(path, mmap_mode='r'), False
+    if not _is_tiff(path):
+        raise ValueError(f"Mode tile hanya mendukung {', '.join(TILED_EXTENSIONS)}: {os.path.basename(path)}")
+
+    tifffile = _import_tifffile()
+    try:
+        # Uncompressed, contiguous TIFFs map straight into memory
+        return tifffile.memmap(path, mode='r'), True
+    except ValueError:
+        pass
+
+    # Compressed or tiled TIFF: decode only the chunks a slice touches
+    try:
+        import zarr
+    except ImportError:
+        raise ValueError("TIFF terkompresi memerlukan paket 'zarr' untuk mode tile, "
+                         "atau simpan ulang sebagai TIFF tanpa kompresi.")
+    store = tifffile.imread(path, aszarr=True)
+    return zarr.open(store, mode='r'), True
+
+
+def create_tiled_output(path, shape, dtype):
+    """Create a memory-mapped output file of the given shape"""
+    if path.lower().endswith('.npy'):
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    if not _is_tiff(path):
+        raise ValueError(f"Output mode tile harus {', '.join(TILED_EXTENSIONS)}: {os.path.basename(path)}")
+
+    tifffile = _import_tifffile()
+    photometric = 'rgb' if len(shape) == 3 else 'minisblack'
+    return tifffile.memmap(path, shape=shape, dtype=dtype, photometric=photometric,
+                           bigtiff=np.prod(shape) * np.dtype(dtype).itemsize > 2 ** 31)
+
+
+def _to_bgr(block, rgb):
+    """Convert a decoded block to the engine's BGR/grayscale convention"""
+    if block.ndim == 3:
+        if block.shape[2] == 4:
+            block = block[:, :, :3]
+        if rgb:
+            block = block[:, :, ::-1]
+    return np.ascontiguousarray(block)
+
+
+def iter_tiles(height, width, tile_size):
+    """Yield (y, x, h, w) for every tile covering a height x width image"""
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            yield y, x, min(tile_size, height - y), min(tile_size, width - x)
+
+
+def check_tiled_steps(steps):
+    """Raise ValueError if steps cannot be run tile by tile"""
+    if any(engine.OPERATIONS[name][1] or name == 'masks' for name, _ in steps):
+        raise ValueError("Operasi dengan gambar lain belum didukung dalam mode tile.")
+    if any(name in UNTILED_OPERATIONS for name, _ in steps):
+        raise ValueError("Deteksi tepi (Canny) tidak didukung dalam mode tile: "
+                         "hasilnya bergantung pada seluruh gambar.")
+
+
+def process_tiled(input_path, steps, output_path, tile_size=DEFAULT_TILE_SIZE, cancel_event=None):
+    """Apply an operation chain tile by tile, writing the output in tiles
+
+    Each tile is read with a halo of engine.operations_halo(steps) pixels so
+    neighbourhood operations (dilation, erosion, morphology) see the same context
+    as a whole-image run; only the tile's own pixels are written out.
+    Canny is rejected: its hysteresis follows edges across any distance, so
+    no fixed halo makes a tile match the whole image. Returns the output
+    (height, width).
+    """
+    check_tiled_steps(steps)
+
+    source, rgb = open_tiled_source(input_path)
+    height, width = source.shape[:2]
+    halo = engine.operations_halo(steps)
+    output = None
+    out_rgb = _is_tiff(output_path)
+
+    for y, x, h, w in iter_tiles(height, width, tile_size):
+        if cancel_event is not None and cancel_event.is_set():
+            raise engine.OperationCancelled()
+
+        y0, x0 = max(0, y - halo), max(0, x - halo)
+        y1, x1 = min(height, y + h + halo), min(width, x + w + halo)
+        block = _to_bgr(source[y0:y1, x0:x1], rgb)
+
+        result = engine.apply_operations(block, steps)
+        core = result[y - y0:y - y0 + h, x - x0:x - x0 + w]
+
+        if output is None:
+            # The first tile tells us the output channels and dtype
+            output = create_tiled_output(output_path, (height, width) + core.shape[2:], core.dtype)
+        if out_rgb and core.ndim == 3:
+            core = core[:, :, ::-1]
+        output[y:y + h, x:x + w] = core
+
+    output.flush()
+    del output
+    return height, width
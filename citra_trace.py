@@ -0,0 +1,191 @@
+"""Lightweight tracing of processing stages.
+
+Setiap tahap (decode, operasi, pyramid, resize, cvtColor, PhotoImage, encode)
+dibungkus span(). Saat tracing mati, span() hanya mengembalikan context
+manager kosong yang sama sehingga overhead-nya hampir nol. Saat tracing
+aktif, setiap span dicatat sebagai event Chrome trace ("X") beserta alokasi
+memori bersih dan puncaknya (tracemalloc), dan dapat diekspor ke JSON yang
+bisa dibuka di chrome://tracing atau ui.perfetto.dev.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+MAX_EVENTS = 500_000
+# Category of the coarse, non-overlapping stages summed by breakdown()
+STAGE = 'stage'
+
+_tracer = None
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    """Collects complete ("X") trace events from every thread of a process"""
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.events = []
+        self.dropped = 0
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, event):
+        with self._lock:
+            if len(self.events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            self.events.append(event)
+
+    def extend(self, events):
+        for event in events:
+            self.record(event)
+
+    def stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+            thread = threading.current_thread()
+            self._threads[(os.getpid(), thread.ident)] = thread.name
+        return stack
+
+    def thread_names(self):
+        return [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                for (pid, tid), name in self._threads.items()]
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start', 'mem_start', 'mem_peak')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        if self.tracer.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Fold the peak reached so far into the enclosing span before resetting it
+                stack[-1].mem_peak = max(stack[-1].mem_peak, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = self.mem_peak = current
+        stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        tracer = self.tracer
+        stack = tracer.stack()
+        stack.pop()
+        args = self.args
+        if tracer.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.mem_peak = max(self.mem_peak, peak)
+            if stack:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, self.mem_peak)
+            args = dict(args, alloc_kb=(current - self.mem_start) // 1024,
+                        peak_kb=(self.mem_peak - self.mem_start) // 1024)
+        if exc_type is not None:
+            args = dict(args, error=exc_type.__name__)
+        tracer.record({
+            'name': self.name, 'cat': self.cat, 'ph': 'X',
+            'ts': self.start / 1000, 'dur': (end - self.start) / 1000,
+            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args,
+        })
+        return False
+
+
+def enable(track_memory=True):
+    """Start tracing in this process; returns the active Tracer"""
+    global _tracer
+    if _tracer is None:
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracer = Tracer(track_memory and tracemalloc.is_tracing())
+    return _tracer
+
+
+def disable():
+    """Stop tracing and return the tracer with everything recorded so far"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None and tracer.track_memory:
+        tracemalloc.stop()
+    return tracer
+
+
+def is_enabled():
+    return _tracer is not None
+
+
+def span(name, cat=STAGE, **args):
+    """Context manager timing a block; a shared no-op when tracing is off"""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _Span(_tracer, name, cat, args)
+
+
+def mark():
+    """Position in the event list, for events_since()"""
+    return len(_tracer.events) if _tracer is not None else 0
+
+
+def events_since(position):
+    if _tracer is None:
+        return []
+    with _tracer._lock:
+        return _tracer.events[position:]
+
+
+def drain():
+    """Take and clear the recorded events (used to ship them out of a worker)"""
+    if _tracer is None:
+        return []
+    with _tracer._lock:
+        events, _tracer.events = _tracer.events, []
+    return events + _tracer.thread_names()
+
+
+def add_events(events):
+    """Merge events recorded elsewhere, e.g. by batch worker processes"""
+    if _tracer is not None:
+        _tracer.extend(events)
+
+
+def breakdown(events):
+    """Total milliseconds per stage name, in order of first appearance"""
+    totals = {}
+    for event in events:
+        if event.get('cat') == STAGE and event.get('ph') == 'X':
+            totals[event['name']] = totals.get(event['name'], 0.0) + event['dur'] / 1000
+    return totals
+
+
+def format_breakdown(events):
+    """One-line summary such as 'operasi 42.1 ms · pyramid 8.3 ms'"""
+    return " · ".join(f"{name} {ms:.1f} ms" for name, ms in breakdown(events).items())
+
+
+def export(path, tracer=None):
+    """Write all events as Chrome trace-event JSON; returns the number of events"""
+    tracer = tracer or _tracer
+    if tracer is None:
+        raise ValueError("Tracing tidak aktif.")
+    with tracer._lock:
+        events = list(tracer.events)
+    # One thread-name record per thread, wherever it was recorded
+    names = {(e['pid'], e['tid']): e for e in events + tracer.thread_names() if e.get('ph') == 'M'}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'traceEvents': [event for event in events if event.get('ph') != 'M'] + list(names.values()),
+            'displayTimeUnit': 'ms',
+            'otherData': {'dropped_events': tracer.dropped},
+        }, f)
+    return len(events)
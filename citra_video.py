@@ -0,0 +1,202 @@
+"""Video processing with overlapping decode, process and encode stages.
+
+Frame dibaca oleh thread decoder, diproses dengan rantai operasi engine, lalu
+ditulis oleh thread encoder. Antar tahap dihubungkan antrean berukuran
+terbatas, sehingga decode, komputasi dan encode berjalan bersamaan tanpa
+menumpuk frame di memori. Gambar kedua dipakai sebagai mask statis untuk
+operasi logika ('and', 'or', 'xor') pada setiap frame.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+
+import cv2
+
+import citra_engine as engine
+import citra_parallel
+import citra_trace as trace
+from citra_batch import steps_from_args
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_FPS = 25.0
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+# Output extension -> FourCC of a codec OpenCV can always write
+FOURCC = {
+    '.mp4': 'mp4v',
+    '.mov': 'mp4v',
+    '.mkv': 'mp4v',
+    '.avi': 'MJPG',
+}
+
+# Marks the end of the frame stream in a queue
+_END = object()
+
+
+def apply_to_frame(frame, steps, mask=None, executor=None):
+    """Run steps on one frame; mask (a MatchedImage) is matched per step geometry once
+
+    executor (a citra_parallel.StripExecutor) splits the frame into strips.
+    """
+    if executor is not None:
+        return executor.apply(frame, steps, second=mask)
+    return engine.apply_operations(frame, steps, second=mask)
+
+
+def video_output_path(input_path, output, ext=None):
+    """output is either a file name or a directory for <stem><ext>"""
+    if os.path.splitext(output)[1]:
+        return output
+    os.makedirs(output, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    if ext and not ext.startswith('.'):
+        ext = '.' + ext
+    return os.path.join(output, stem + (ext or '.mp4'))
+
+
+def process_video(input_path, steps, output_path, second=None, queue_size=DEFAULT_QUEUE_SIZE,
+                  cancel_event=None, executor=None):
+    """Stream every frame of a video file through steps into output_path
+
+    Decoding and encoding run on their own threads, connected to the
+    processing loop by queues of at most queue_size frames. second, if
+    given, is the mask for logic steps (an array or engine.MatchedImage; it is
+    resized once per frame geometry). executor, if given, processes each
+    frame as parallel strips. Returns (frames, elapsed_seconds).
+    """
+    if second is None and any(engine.OPERATIONS[name][1] for name, _ in steps):
+        raise ValueError("Operasi logika pada video memerlukan gambar kedua sebagai mask.")
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext not in FOURCC:
+        raise ValueError(f"Format video output harus salah satu dari: {', '.join(FOURCC)}")
+
+    capture = cv2.VideoCapture(input_path)
+    if not capture.isOpened():
+        raise ValueError(f"Tidak dapat membuka video: {os.path.basename(input_path)}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    mask = second
+    if second is not None and not isinstance(second, engine.MatchedImage):
+        mask = engine.MatchedImage(second)
+
+    decoded = queue.Queue(maxsize=queue_size)
+    processed = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    written = [0]
+
+    def put(q, item):
+        # Block while the next stage is busy, but give up once stopping
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return _END
+
+    def decode():
+        try:
+            while not stop.is_set():
+                with trace.span('decode'):
+                    ok, frame = capture.read()
+                if not ok:
+                    break
+                if not put(decoded, frame):
+                    return
+            put(decoded, _END)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            capture.release()
+
+    def encode():
+        writer = None
+        try:
+            while True:
+                frame = get(processed)
+                if frame is _END:
+                    break
+                if frame.ndim == 2:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*FOURCC[ext]), fps, (w, h))
+                    if not writer.isOpened():
+                        raise ValueError(f"Tidak dapat menulis video ke: {os.path.basename(output_path)}")
+                with trace.span('encode'):
+                    writer.write(frame)
+                written[0] += 1
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if writer is not None:
+                writer.release()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=decode, name="citra-video-decode", daemon=True),
+               threading.Thread(target=encode, name="citra-video-encode", daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise engine.OperationCancelled()
+            frame = get(decoded)
+            if frame is _END:
+                break
+            with trace.span('operasi'):
+                result = apply_to_frame(frame, steps, mask, executor)
+            if not put(processed, result):
+                break
+        put(processed, _END)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    if not written[0]:
+        raise ValueError(f"Video tidak berisi frame yang dapat dibaca: {os.path.basename(input_path)}")
+    return written[0], time.perf_counter() - start
+
+
+def format_rate(frames, elapsed):
+    rate = frames / elapsed if elapsed > 0 else 0.0
+    return f"{frames} frame diproses dalam {elapsed:.2f} s ({rate:.1f} fps)"
+
+
+def main(args):
+    """Entry point for `citra.py --video`, returns the process exit code"""
+    executor = None
+    try:
+        steps = steps_from_args(args)
+        second = engine.load_image(args.second) if args.second else None
+        output_path = video_output_path(args.video, args.output, args.format)
+        executor = citra_parallel.configure(args.threads, args.cv_threads)
+        frames, elapsed = process_video(args.video, steps, output_path, second=second, executor=executor)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    print(format_rate(frames, elapsed))
+    print(f"Output: {output_path}")
+    if args.trace:
+        count = trace.export(args.trace)
+        print(f"Trace ({count} event) disimpan: {args.trace}")
+    return 0
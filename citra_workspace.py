@@ -0,0 +1,230 @@
+"""Multi-image workspace with a memory budget and spill to disk.
+
+Banyak dokumen (gambar utama beserta hasil pemrosesannya) dapat dibuka
+sekaligus. Bila total array di memori melebihi anggaran, array yang paling
+lama tidak dipakai ditulis (spill) oleh thread latar belakang ke file .npy
+di disk lokal lalu dilepas dari RAM. Saat dibutuhkan lagi, array dibaca
+kembali lewat memory map tanpa mendekode ulang file sumbernya. Dokumen
+yang sedang aktif tidak pernah di-spill.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+DEFAULT_WORKSPACE_BYTES = 1024 * 1024 * 1024
+ROLES = ('original', 'processed')
+
+
+class Document:
+    """One open image: its source path, the steps of its result, and an id for the Workspace"""
+    _ids = itertools.count(1)
+
+    def __init__(self, path):
+        self.id = next(Document._ids)
+        self.path = path
+        self.name = os.path.basename(path)
+        self.specs = []  # (name, params) steps that produced the 'processed' array
+
+
+class _Entry:
+    __slots__ = ('array', 'nbytes', 'path', 'spilling')
+
+    def __init__(self, array):
+        self.array = array
+        self.nbytes = array.nbytes
+        self.path = None  # Spill file, once written
+        self.spilling = False  # Queued for writing; dropped from RAM when done
+
+
+class Workspace:
+    """Arrays of many Documents under a RAM budget, spilling the LRU ones to disk
+
+    Arrays are stored per (document, role) and must not be modified after
+    put(). When the resident total exceeds max_bytes, least recently used
+    arrays of inactive documents are written to memory-mappable .npy files
+    on a background thread and released. get() pages a spilled array back
+    in as a read-only memory map; evicting it again later costs no write.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_WORKSPACE_BYTES, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.documents = []
+        self.active = None
+        self.spills = 0
+        self.page_ins = 0
+        self._spill_parent = spill_dir
+        self._spill_dir = None
+        self._entries = OrderedDict()  # (document id, role) -> _Entry, LRU first
+        self._bytes = 0  # Resident, including arrays still being written
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="citra-spill")
+        self._names = itertools.count()
+
+    @property
+    def nbytes(self):
+        """Bytes of arrays currently held in RAM"""
+        return self._bytes
+
+    @property
+    def disk_bytes(self):
+        """Bytes of arrays with a spill file on disk"""
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values() if entry.path)
+
+    def __len__(self):
+        return len(self.documents)
+
+    # --- Documents ---
+
+    def add(self, path, original):
+        """Open a new document for an already decoded image and make it the active one
+
+        It is activated before its array is stored, so the eviction that
+        makes room for it never picks the new document itself.
+        """
+        document = Document(path)
+        self.documents.append(document)
+        with self._lock:
+            self.active = document
+        self.put(document, 'original', original)
+        return document
+
+    def close(self, document):
+        """Forget a document and delete its spill files"""
+        with self._lock:
+            for role in ROLES:
+                self._remove_locked((document.id, role))
+        self.documents.remove(document)
+        if self.active is document:
+            self.active = None
+
+    def activate(self, document):
+        """Make document the active one; its arrays are never spilled"""
+        with self._lock:
+            self.active = document
+            # The previously active document may now be evicted
+            self._evict_locked()
+
+    # --- Arrays ---
+
+    def put(self, document, role, array):
+        """Store (or with None, drop) the array of a document's role"""
+        key = (document.id, role)
+        with self._lock:
+            entry = self._entries.get(key)
+            if array is not None and entry is not None and entry.array is array:
+                self._entries.move_to_end(key)
+                return
+            self._remove_locked(key)
+            if array is None:
+                return
+            entry = _Entry(array)
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            self._evict_locked()
+
+    def get(self, document, role):
+        """Array of a document's role (paged back in if spilled), or None"""
+        key = (document.id, role)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.spilling = False  # Used again: keep it in RAM after all
+            if entry.array is None:
+                entry.array = np.load(entry.path, mmap_mode='r')
+                self._bytes += entry.nbytes
+                self.page_ins += 1
+                self._evict_locked()
+            return entry.array
+
+    def is_resident(self, document, role):
+        entry = self._entries.get((document.id, role))
+        return entry is not None and entry.array is not None
+
+    def _remove_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.array is not None:
+            self._bytes -= entry.nbytes
+        entry.array = None
+        if entry.path:
+            _remove_file(entry.path)
+
+    def _evict_locked(self):
+        active = self.active.id if self.active is not None else None
+        pending = sum(entry.nbytes for entry in self._entries.values() if entry.spilling)
+        for key, entry in list(self._entries.items()):
+            if self._bytes - pending <= self.max_bytes:
+                break
+            if key[0] == active or entry.array is None or entry.spilling:
+                continue
+            if entry.path:
+                # Already on disk (paged in earlier): just let go of it
+                entry.array = None
+                self._bytes -= entry.nbytes
+            else:
+                entry.spilling = True
+                pending += entry.nbytes
+                self._writer.submit(self._spill, key, entry)
+
+    def _spill(self, key, entry):
+        array = entry.array
+        if array is None:
+            return
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="citra-workspace-", dir=self._spill_parent)
+        path = os.path.join(self._spill_dir, f"{key[0]}-{key[1]}-{next(self._names)}.npy")
+        try:
+            mapped = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+            mapped[...] = array
+            mapped.flush()
+            del mapped
+        except OSError:
+            # Disk full or not writable: the array just stays in RAM
+            _remove_file(path)
+            with self._lock:
+                entry.spilling = False
+            return
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                _remove_file(path)  # Replaced or closed while being written
+                return
+            entry.path = path
+            self.spills += 1
+            if entry.spilling:
+                entry.spilling = False
+                entry.array = None
+                self._bytes -= entry.nbytes
+            else:
+                # Used again while being written; rebalance with the file in place
+                self._evict_locked()
+
+    def flush(self):
+        """Wait until every queued spill has been written"""
+        self._writer.submit(lambda: None).result()
+
+    def shutdown(self):
+        """Stop the writer and delete all spill files"""
+        self._writer.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # e.g. still memory-mapped on Windows; removed with the directory
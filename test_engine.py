@@ -0,0 +1,62 @@
+"""citra_engine operations on inputs the GUI, batch and CLI pass in"""
+import numpy as np
+import pytest
+
+import citra_engine as engine
+
+
+def _mask(height, width, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((height, width)) > 0.5, 255, 0).astype(np.uint8)
+
+
+def test_logic_combine_keeps_matched_image_same_shape():
+    a, b = _mask(20, 30, seed=1), _mask(20, 30, seed=2)
+    second = engine.MatchedImage(b.copy())
+    result = engine.logic_combine('and', [second, a])
+    assert np.array_equal(result, b & a)
+    assert np.array_equal(second.image, b)
+    assert result is not second.image
+
+
+def test_logic_combine_matched_image_other_shape():
+    a, b = _mask(20, 30, seed=1), _mask(40, 60, seed=2)
+    second = engine.MatchedImage(b.copy())
+    result = engine.logic_combine('or', [second, a], shape=a.shape)
+    assert np.array_equal(result, engine.match_shape(b, a.shape) | a)
+    assert np.array_equal(second.image, b)
+    assert not np.shares_memory(result, second.matched(a.shape))
+
+
+def _gradient16():
+    return np.linspace(0, 65535, 64 * 48).astype(np.uint16).reshape(48, 64)
+
+
+def test_gamma_and_contrast_on_16_bit():
+    image = _gradient16()
+    gamma = engine.apply_operations(image, [('gamma', {'gamma': 2.0})])
+    assert gamma.dtype == np.uint16
+    expected = np.rint(65535.0 * (image / 65535.0) ** 2.0).astype(np.uint16)
+    assert np.array_equal(gamma, expected)
+
+    contrast = engine.apply_operations(image, [('contrast', {})])
+    assert contrast.dtype == np.uint16
+    # The 8-bit pivot 128 is 128 * 257 on the 16-bit scale
+    expected = np.clip(np.rint((image - 128 * 257.0) * 1.5 + 128 * 257.0), 0, 65535).astype(np.uint16)
+    assert np.array_equal(contrast, expected)
+
+
+def test_fused_point_run_on_16_bit_matches_steps():
+    image = np.dstack([_gradient16()] * 3)
+    steps = [('gamma', {'gamma': 0.5}), ('contrast', {'factor': 1.2}), ('invert', {})]
+    expected = image
+    for name, params in steps:
+        expected = engine.OPERATIONS[name][0](expected, **params)
+    result = engine.apply_operations(image, steps)
+    assert result.dtype == np.uint16
+    assert np.array_equal(result, expected)
+
+
+def test_gamma_rejects_unsupported_dtype():
+    with pytest.raises(ValueError):
+        engine.gamma_correction(np.zeros((4, 4), dtype=np.float32), 2.0)
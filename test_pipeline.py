@@ -0,0 +1,29 @@
+"""PipelineHistory checkpoints: failures are recorded, restores still rebuild"""
+import numpy as np
+
+from citra_pipeline import Pipeline, PipelineHistory
+
+
+def test_failed_checkpoint_is_recorded():
+    history = PipelineHistory(checkpoint_interval=1)
+    try:
+        # PNG cannot hold 64-bit integers, so encoding fails on the encoder thread
+        history._store_checkpoint(history._key([('invert', {})]), np.zeros((4, 4), np.int64), 0)
+        assert history.failed_checkpoints == 1
+        assert history.last_checkpoint_error is not None
+        assert history.nbytes == 0
+    finally:
+        history.shutdown()
+
+
+def test_restore_without_checkpoint_recomputes():
+    image = np.arange(64, dtype=np.uint8).reshape(8, 8)
+    history = PipelineHistory(checkpoint_interval=1)
+    pipeline = Pipeline()
+    pipeline.set_source(image)
+    try:
+        specs = [('invert', {})]
+        history._store_checkpoint(history._key(specs), np.zeros((4, 4), np.int64), 0)
+        assert np.array_equal(history.restore(pipeline, specs)(), 255 - image)
+    finally:
+        history.shutdown()
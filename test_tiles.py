@@ -0,0 +1,31 @@
+"""Tiled runs must match whole-image runs, or refuse the chain"""
+import numpy as np
+import pytest
+
+import citra_engine as engine
+import citra_tiles
+
+
+def _image():
+    rng = np.random.default_rng(0)
+    image = np.zeros((300, 270), dtype=np.uint8)
+    for _ in range(40):
+        y, x = rng.integers(0, 280, 2)
+        image[y:y + 20, x:x + 3] = 255
+    return image
+
+
+def test_tiled_matches_whole_image(tmp_path):
+    image = _image()
+    steps = [('morph', {'op': 'close', 'size': 5}), ('dilate', {}), ('invert', {})]
+    source, output = tmp_path / 'in.npy', tmp_path / 'out.npy'
+    np.save(source, image)
+    citra_tiles.process_tiled(str(source), steps, str(output), tile_size=64)
+    assert np.array_equal(np.load(output), engine.apply_operations(image, steps))
+
+
+def test_tiled_rejects_canny(tmp_path):
+    source = tmp_path / 'in.npy'
+    np.save(source, _image())
+    with pytest.raises(ValueError):
+        citra_tiles.process_tiled(str(source), [('edge', {})], str(tmp_path / 'out.npy'), tile_size=64)